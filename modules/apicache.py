@@ -0,0 +1,153 @@
+"""Mali on-disk TTL cache za Spotify API odgovore.
+
+Generator batch-eva (download_gen_artist) često se ponovno pokreće za istog
+artista u kratkom roku; isti endpointi tada vraćaju iste podatke. Cache
+čuva JSON tijelo odgovora po ključu (URL + parametri) u SQLite bazi, s
+rokom trajanja po vrsti endpointa.
+
+Tablica:
+  cache(key TEXT PRIMARY KEY, body BLOB, expires_at INTEGER)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utils.json_io import dumps_bytes, loads
+
+log = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_PATH = PROJECT_ROOT / "data" / "cache" / "spotify_api.sqlite"
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# TTL po endpointu (prefiks putanje iza /v1). Albumi i trackovi se praktički
+# ne mijenjaju; diskografija artista i search mogu dobiti nove izdaje.
+TTL_ALBUM = 7 * DAY
+TTL_TRACK = 7 * DAY
+TTL_ARTIST_ALBUMS = DAY
+TTL_DEFAULT = DAY
+# Ime artista → Spotify ID (i obrnuto) se praktički nikad ne mijenja
+TTL_ARTIST_ID = 30 * DAY
+
+
+def ttl_for_url(url: str) -> int:
+    """Odredi TTL (sekunde) prema putanji Spotify endpointa."""
+    path = url.split("/v1", 1)[-1].split("?", 1)[0]
+    if path.startswith("/artists/") and path.endswith("/albums"):
+        return TTL_ARTIST_ALBUMS
+    if path.startswith("/artists/") and path.count("/") == 2:
+        # /artists/{id} — koristi se za id → ime
+        return TTL_ARTIST_ID
+    if path.startswith("/albums"):
+        return TTL_ALBUM
+    if path.startswith("/tracks"):
+        return TTL_TRACK
+    return TTL_DEFAULT
+
+
+def make_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Stabilan ključ: hash URL-a + sortiranih parametara."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(url.encode("utf-8"))
+    h.update(json.dumps(params or {}, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+# cache dijele match.py threadovi i generator (više procesa); ako je baza
+# zaključana dulje od ovoga, čitanje je miss, a zapis se preskače
+BUSY_TIMEOUT = 1.0
+
+
+class ApiCache:
+    """SQLite TTL cache; siguran za korištenje iz više threadova (jedan lock).
+
+    Greške baze (npr. "database is locked" od drugog procesa) ne ruše run:
+    get() tada vraća None, a put() preskače zapis.
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), timeout=BUSY_TIMEOUT, check_same_thread=False)
+        # WAL: čitatelji ne čekaju pisca, a pisci drže lock samo za svoj commit
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, body BLOB NOT NULL, expires_at INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Vrati spremljeni JSON ako postoji i nije istekao, inače None."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT body, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as exc:
+            log.debug("API cache: čitanje nije uspjelo (%s) — miss.", exc)
+            return None
+        if row is None:
+            return None
+        body, expires_at = row
+        if expires_at <= time.time():
+            return None
+        return loads(body)
+
+    def put(self, key: str, data: Any, ttl: int) -> None:
+        """Spremi JSON odgovor s rokom trajanja ttl sekundi."""
+        body = dumps_bytes(data)
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, body, expires_at) VALUES (?, ?, ?)",
+                    (key, body, int(time.time()) + ttl),
+                )
+                self._conn.commit()
+            except sqlite3.Error as exc:
+                log.debug("API cache: zapis nije uspio (%s) — preskačem.", exc)
+                try:
+                    self._conn.rollback()
+                except sqlite3.Error:
+                    pass
+
+    def purge_expired(self) -> int:
+        """Obriši istekle zapise; vraća broj obrisanih."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (int(time.time()),))
+            self._conn.commit()
+        return cur.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_cache(path: Path = DEFAULT_CACHE_PATH) -> Optional[ApiCache]:
+    """Otvori cache; ako ne uspije (npr. read-only disk), vrati None i radi bez njega."""
+    try:
+        cache = ApiCache(path)
+    except (OSError, sqlite3.Error) as exc:
+        log.warning("Ne mogu otvoriti API cache %s (%s) — radim bez njega.", path, exc)
+        return None
+    try:
+        cache.purge_expired()
+    except sqlite3.Error as exc:
+        # npr. drugi proces upravo piše; istekli zapisi ionako su miss
+        log.debug("API cache: purge nije uspio (%s).", exc)
+        try:
+            cache._conn.rollback()
+        except sqlite3.Error:
+            pass
+    return cache
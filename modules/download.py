@@ -11,15 +11,27 @@ FAZA 2b + PROGRESS BAR:
 from __future__ import annotations
 
 import argparse
+import atexit
+import collections
+import errno
+import functools
 import json
 import logging
+import logging.handlers
+import os
+import queue
+import shlex
 import shutil
+import sqlite3
 import subprocess
 import sys
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, BinaryIO, ClassVar, Deque, Dict, Iterator, List, Optional, Set, Tuple
 
 # Pretpostavka: config.py je u project rootu i sadrži ove simbole.
 try:
@@ -28,14 +40,57 @@ try:
         get_downloader_tmp_dir,
         get_downloader_batch_dir,
         get_default_music_root,
+        get_spotify_credentials_path,
     )
 except ImportError as exc:
     print("[FATAL] Nije moguće importati downloader config iz config.py:", exc, file=sys.stderr)
     sys.exit(1)
 
 
+try:
+    import ijson  # opcionalno: streaming parsiranje velikih batch JSON-ova
+except ImportError:
+    ijson = None
+
+
 AUDIO_EXTS = [".mp3", ".flac", ".m4a", ".ogg", ".wav"]
 
+# Maksimalno trajanje jednog spotdl procesa i koliko zadnjih linija
+# njegovog outputa čuvamo za log u slučaju greške
+SPOTDL_TIMEOUT_SEC = 600
+SPOTDL_OUTPUT_TAIL = 50
+
+# Ključevi bez kojih batch zapis nije upotrebljiv
+REQUIRED_BATCH_KEYS = frozenset({"spotify_id", "artist", "album", "track_name"})
+
+
+# ---------------------------------------------------------------------
+# Memoizirani config getteri
+# ---------------------------------------------------------------------
+# Config getteri u praksi vraćaju konstante (fiksne putanje + env varijable),
+# pa ih računamo jednom po procesu umjesto pri svakom pozivu (npr. po workeru).
+
+@functools.lru_cache(maxsize=None)
+def _tmp_dir() -> Path:
+    return Path(get_downloader_tmp_dir())
+
+
+@functools.lru_cache(maxsize=None)
+def _log_dir() -> Path:
+    return Path(get_downloader_log_dir())
+
+
+@functools.lru_cache(maxsize=None)
+def _music_root() -> Optional[Path]:
+    return get_default_music_root()
+
+
+def reset_config_cache() -> None:
+    """Očisti memoizirane config vrijednosti (npr. nakon promjene env varijabli)."""
+    _tmp_dir.cache_clear()
+    _log_dir.cache_clear()
+    _music_root.cache_clear()
+
 
 @dataclass
 class TrackTask:
@@ -48,16 +103,38 @@ class TrackTask:
     track_name: str
     disc_number: Optional[int] = None
     track_number: Optional[int] = None
+    album_spotify_id: Optional[str] = None
+
+    # Jedan zajednički Path po (artist, year, album) — svi trackovi albuma
+    # dijele isti objekt, a unikatno je samo ime fajla.
+    # Izvedene vrijednosti (album_dir, target_*, spotify_track_url) su
+    # cached_property: računaju se jednom po tasku, pri prvom pristupu.
+    _album_dir_cache: ClassVar[Dict[Tuple[str, str, str], Path]] = {}
 
+    @functools.cached_property
+    def album_dir(self) -> Path:
+        """Relativni folder albuma: Artist/Year/Album (cacheiran po albumu)."""
+        year_str = str(self.album_year) if self.album_year is not None else "0000"
+        key = (self.artist, year_str, self.album)
+        cached = self._album_dir_cache.get(key)
+        if cached is None:
+            cached = self._album_dir_cache.setdefault(key, Path(self.artist) / year_str / self.album)
+        return cached
+
+    @functools.cached_property
     def target_rel_path(self) -> Path:
         """
         Relativni path unutar base_path gdje bi fajl trebao završiti.
         Folder struktura: Artist/Year/Album/Artist - Title.ext (ext se još ne zna).
         """
-        year_str = str(self.album_year) if self.album_year is not None else "0000"
-        filename = f"{self.artist} - {self.track_name}"
-        return Path(self.artist) / year_str / self.album / filename
+        return self.album_dir / self.target_filename
 
+    @functools.cached_property
+    def target_filename(self) -> str:
+        """Ime fajla bez ekstenzije: 'Artist - Title'."""
+        return f"{self.artist} - {self.track_name}"
+
+    @functools.cached_property
     def spotify_track_url(self) -> str:
         """Vrati punu Spotify URL za ovaj track."""
         if self.spotify_url:
@@ -65,24 +142,60 @@ class TrackTask:
         return f"https://open.spotify.com/track/{self.spotify_id}"
 
 
+# Aktivni QueueListener (v. setup_logging); čuva se da ga ponovni
+# setup_logging u istom procesu (npr. download_queue) može zatvoriti.
+_LOG_LISTENER: Optional[logging.handlers.QueueListener] = None
+
+
+def stop_logging() -> None:
+    """Zaustavi log listener (isprazni queue) i zatvori njegove handlere."""
+    global _LOG_LISTENER
+    listener = _LOG_LISTENER
+    if listener is None:
+        return
+    _LOG_LISTENER = None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+# stop() isprazni queue prije izlaska, da se ne izgube zadnje poruke
+atexit.register(stop_logging)
+
+
 def setup_logging(log_level: str) -> None:
-    """Postavi logging konfiguraciju."""
+    """Postavi logging konfiguraciju (svaki poziv otvara novi log fajl)."""
+    global _LOG_LISTENER
+    stop_logging()
+
     numeric_level = getattr(logging, log_level.upper(), None)
     if not isinstance(numeric_level, int):
         numeric_level = logging.INFO
 
-    log_dir = Path(get_downloader_log_dir())
+    log_dir = _log_dir()
     log_dir.mkdir(parents=True, exist_ok=True)
     log_file = log_dir / f"download_{time.strftime('%Y%m%d_%H%M%S')}.log"
 
-    logging.basicConfig(
-        level=numeric_level,
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler(log_file, encoding="utf-8"),
-        ],
+    # Root logger dobiva samo QueueHandler (brzi enqueue iz workera), a stvarni
+    # zapis na stdout i u fajl radi QueueListener u pozadinskom threadu.
+    formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
+    stream_handler = logging.StreamHandler(sys.stdout)
+    file_handler = logging.FileHandler(log_file, encoding="utf-8")
+    for handler in (stream_handler, file_handler):
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, file_handler, respect_handler_level=True
     )
+    listener.start()
+    _LOG_LISTENER = listener
+
+    # QueueHandler samo ugradi args u poruku; vrijeme/level dodaje formatter
+    # handlera u listeneru (inače bi se poruka formatirala dvaput)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(level=numeric_level, handlers=[queue_handler], force=True)
     logging.info("Downloader start")
     logging.info("Log file: %s", log_file)
 
@@ -100,7 +213,7 @@ def resolve_base_path(cli_base_path: Optional[str]) -> Path:
         logging.info("Base path (CLI): %s", base)
         return base
 
-    env_base = get_default_music_root()
+    env_base = _music_root()
     if env_base is not None:
         logging.info("Base path (env ZMUSIC_MUSIC_ROOT): %s", env_base)
         return env_base
@@ -141,6 +254,28 @@ def add_common_args(parser: argparse.ArgumentParser) -> None:
         action="store_true",
         help="Na kraju prikaži sažetak (statistiku).",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Broj paralelnih downloada (spotdl procesa) u batch modu (default: 1).",
+    )
+    parser.add_argument(
+        "--spotdl-api",
+        action="store_true",
+        help="Koristi spotdl kao Python biblioteku (jedan proces) umjesto CLI-ja po tracku.",
+    )
+    parser.add_argument(
+        "--by-album",
+        action="store_true",
+        help="U batchu skidaj cijeli album jednim spotdl pozivom kad iz istog albuma (album_spotify_id) treba ≥ 2 tracka.",
+    )
+    parser.add_argument(
+        "--scan-jobs",
+        type=int,
+        default=1,
+        help="Paralelno listanje album foldera prije batcha (korisno na NFS/HDD; default: 1 = lijeno, serijski).",
+    )
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
@@ -209,18 +344,227 @@ def build_arg_parser() -> argparse.ArgumentParser:
 # Helperi za batch / download
 # ---------------------------------------------------------------------
 
+def _check_tracks_list(f: BinaryIO) -> None:
+    """
+    ijson provjera strukture batcha: top-level mora biti objekt, a "tracks"
+    (ako postoji) lista. Inače ValueError kao u json.load grani.
+    """
+    events = ijson.parse(f)
+    _, event, _ = next(events, ("", None, None))
+    if event == "start_map":
+        for prefix, event, value in events:
+            if prefix == "" and event == "map_key" and value == "tracks":
+                _, event, _ = next(events)
+                if event == "start_array":
+                    return
+                break
+        else:
+            return  # objekt bez "tracks" → prazna lista, kao data.get("tracks", [])
+    raise ValueError("'tracks' nije lista.")
+
+
+def iter_batch_items(f: BinaryIO) -> Iterator[Any]:
+    """
+    Iteriraj zapise iz "tracks" liste batch JSON-a.
+
+    Ako je dostupan ijson, JSON se parsira streamano pa se u memoriji nikad
+    ne drži cijeli dokument (bitno za batch-eve s desecima tisuća trackova).
+    Inače fallback na json.load.
+    """
+    if ijson is not None:
+        count = 0
+        for item in ijson.items(f, "tracks.item", use_float=True):
+            count += 1
+            yield item
+        if count == 0:
+            # nula zapisa: provjeri strukturu kao i json.load grana (rijetko,
+            # pa drugi prolaz ne košta ništa u normalnom slučaju)
+            f.seek(0)
+            _check_tracks_list(f)
+        return
+
+    data = json.load(f)
+    tracks_data = data.get("tracks", []) if isinstance(data, dict) else None
+    if not isinstance(tracks_data, list):
+        raise ValueError("'tracks' nije lista.")
+    yield from tracks_data
+
+
+def _intern(value: Any) -> Any:
+    """sys.intern za stringove; ostale vrijednosti vraća nepromijenjene."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
 def find_existing_audio(base_without_ext: Path) -> Optional[Path]:
     """
     Provjeri postoji li već audio fajl za zadanu bazu imena.
-    Traži ekstenzije iz AUDIO_EXTS.
+    Traži ekstenzije iz AUDIO_EXTS (redoslijed = prioritet).
+
+    Jedan scandir album direktorija umjesto stat-a po ekstenziji;
+    DirEntry.is_file() koristi d_type iz readdir-a pa ne treba dodatni stat.
     """
+    album_dir = base_without_ext.parent
+    # .stem + ext daje isto ime kao with_suffix(ext)
+    name = _pick_existing(list_file_names(album_dir), base_without_ext.stem)
+    return album_dir / name if name is not None else None
+
+
+def list_file_names(directory: Path | str) -> Set[str]:
+    """Vrati imena svih fajlova u direktoriju (jedan scandir); prazan skup ako ne postoji."""
+    try:
+        with os.scandir(directory) as it:
+            return {entry.name for entry in it if entry.is_file()}
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+
+
+def _pick_existing(names: Set[str], stem: str) -> Optional[str]:
+    """Ime prvog kandidata stem+ext (po AUDIO_EXTS) koji postoji među names."""
     for ext in AUDIO_EXTS:
-        candidate = base_without_ext.with_suffix(ext)
-        if candidate.is_file():
-            return candidate
+        name = stem + ext
+        if name in names:
+            return name
     return None
 
 
+def find_existing_audio_cached(
+    target_no_ext: str,
+    dir_cache: Dict[str, Set[str]],
+    cache_complete: bool = False,
+) -> Optional[Path]:
+    """
+    Kao find_existing_audio, ali radi nad običnim stringom puta i listing
+    album direktorija čuva u dir_cache (ključ = album direktorij), pa se
+    svaki album lista samo jednom.
+
+    cache_complete=True znači da dir_cache već sadrži sve direktorije
+    (v. walk_audio_listings), pa direktorij kojeg nema u cacheu ne postoji.
+    """
+    album_dir, base_name = os.path.split(target_no_ext)
+    names = dir_cache.get(album_dir)
+    if names is None:
+        names = set() if cache_complete else list_file_names(album_dir)
+        dir_cache[album_dir] = names
+
+    # splitext()[0] je string ekvivalent Path.stem
+    name = _pick_existing(names, os.path.splitext(base_name)[0])
+    return Path(album_dir, name) if name is not None else None
+
+
+def walk_audio_listings(root: Path) -> Dict[str, Set[str]]:
+    """
+    Jednim os.walk prolazom skupi imena audio fajlova po direktoriju
+    (ključ = putanja direktorija kao string, isti oblik kao u cmd_batch).
+    """
+    audio_exts = tuple(AUDIO_EXTS)
+    listings: Dict[str, Set[str]] = {}
+    for dirpath, _dirnames, filenames in os.walk(root):
+        names = {name for name in filenames if name.endswith(audio_exts)}
+        if names:
+            listings[dirpath] = names
+    return listings
+
+
+def prefetch_dir_listings(directories: List[str], workers: int) -> Dict[str, Set[str]]:
+    """
+    Izlistaj više album direktorija paralelno (thread pool).
+
+    scandir oslobađa GIL dok čeka na disk/mrežu, pa na sporom storageu
+    (NFS, HDD) N listinga ide u ~N/workers round-tripova.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(directories, executor.map(list_file_names, directories)))
+
+
+# ---------------------------------------------------------------------
+# Perzistentni "seen" cache (spotify_id -> konačni path)
+# ---------------------------------------------------------------------
+
+SEEN_DB_NAME = "seen.sqlite"
+# više download procesa (download_queue --concurrency) dijeli isti seen cache;
+# zapis koji ne dobije lock u ovom roku se preskače (to je samo cache)
+SEEN_BUSY_TIMEOUT = 1.0
+
+
+def open_seen_cache() -> Optional[sqlite3.Connection]:
+    """
+    Otvori (i po potrebi kreira) seen cache u LOG_DIR/seen.sqlite.
+
+    Ako nešto ne valja, vraća None i batch radi bez cachea.
+
+    Autocommit + WAL: svaki remember_seen je zasebna kratka transakcija, pa
+    paralelni procesi ne čekaju na lock koji bi jedan držao cijeli run.
+    """
+    db_path = _log_dir() / SEEN_DB_NAME
+    try:
+        conn = sqlite3.connect(str(db_path), timeout=SEEN_BUSY_TIMEOUT, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            "spotify_id TEXT PRIMARY KEY, path TEXT NOT NULL, mtime REAL NOT NULL)"
+        )
+    except sqlite3.Error as exc:
+        logging.warning("Ne mogu otvoriti seen cache %s (%s) — radim bez njega.", db_path, exc)
+        return None
+    return conn
+
+
+def load_seen(conn: Optional[sqlite3.Connection]) -> Dict[str, Tuple[str, float]]:
+    """Učitaj cijeli seen cache jednim SELECT-om."""
+    if conn is None:
+        return {}
+    try:
+        rows = conn.execute("SELECT spotify_id, path, mtime FROM seen").fetchall()
+    except sqlite3.Error as exc:
+        logging.warning("Ne mogu čitati seen cache (%s) — radim bez njega.", exc)
+        return {}
+    return {sid: (path, mtime) for sid, path, mtime in rows}
+
+
+def lookup_seen(
+    seen: Dict[str, Tuple[str, float]], spotify_id: str, target_no_ext: str
+) -> Optional[Path]:
+    """
+    Vrati path iz seen cachea ako je to ciljni fajl ovog taska (target_no_ext
+    + audio ekstenzija) i i dalje postoji s istim mtime-om.
+
+    Jedan stat umjesto listanja album direktorija; ako se mtime ne poklapa
+    (fajl zamijenjen/obrisan) ili je zapis iz drugog base patha / layouta,
+    zapis se ne koristi.
+    """
+    entry = seen.get(spotify_id) if spotify_id else None
+    if entry is None:
+        return None
+    path, mtime = entry
+    # target + ekstenzija, ili ime kakvo daje download (target.with_suffix,
+    # koji zamjenjuje i "ekstenziju" iz naslova s točkom)
+    if os.path.splitext(path)[0] != target_no_ext:
+        stored = Path(path)
+        if stored != Path(target_no_ext).with_suffix(stored.suffix):
+            return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if st.st_mtime != mtime:
+        return None
+    return Path(path)
+
+
+def remember_seen(conn: Optional[sqlite3.Connection], spotify_id: str, path: Path) -> None:
+    """Upiši/osvježi zapis u seen cacheu."""
+    if conn is None or not spotify_id:
+        return
+    try:
+        mtime = path.stat().st_mtime
+        conn.execute(
+            "INSERT OR REPLACE INTO seen (spotify_id, path, mtime) VALUES (?, ?, ?)",
+            (spotify_id, str(path), mtime),
+        )
+    except (OSError, sqlite3.Error) as exc:
+        logging.debug("Ne mogu zapisati u seen cache (%s): %s", spotify_id, exc)
+
+
 def list_audio_files_recursive(root: Path) -> Set[Path]:
     """Vrati skup svih audio fajlova (AUDIO_EXTS) ispod root (rekurzivno)."""
     files: Set[Path] = set()
@@ -232,6 +576,22 @@ def list_audio_files_recursive(root: Path) -> Set[Path]:
     return files
 
 
+def move_into_place(src: Path, dst: Path) -> None:
+    """
+    Premjesti skinuti fajl iz TMP-a na konačnu lokaciju.
+
+    Ako su TMP i base_path na istom filesystemu, os.replace je atomski rename
+    bez kopiranja podataka; samo kad nisu (EXDEV) padamo na shutil.move
+    (copy + delete).
+    """
+    try:
+        os.replace(src, dst)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        shutil.move(str(src), str(dst))
+
+
 def render_progress(current: int, total: int, width: int = 40) -> None:
     """
     Ispiši jednostavan progress bar u plavoj boji u formatu:
@@ -252,21 +612,54 @@ def render_progress(current: int, total: int, width: int = 40) -> None:
     print(line, end="", file=sys.stdout, flush=True)
 
 
-def perform_download(task: TrackTask, base_path: Path, tmp_dir: Path) -> Optional[Path]:
-    """
-    Izvrši stvarni download preko spotdl-a za zadani task.
+# ---------------------------------------------------------------------
+# In-process spotdl klijent (opcionalno, --spotdl-api)
+# ---------------------------------------------------------------------
+# Jedan Spotdl objekt po procesu: Spotify klijent, auth i yt-dlp cache se
+# inicijaliziraju jednom, umjesto pokretanja novog interpretera po tracku.
 
-    Vraća path do konačnog audio fajla u base_path ako uspije, inače None.
+_SPOTDL: Any = None
+_SPOTDL_FAILED = False
+_SPOTDL_LOCK = threading.Lock()
+
+
+def get_spotdl_client() -> Any:
     """
-    spotify_url = task.spotify_track_url()
-    logging.info("  [DL] Pokrećem spotdl za URL: %s", spotify_url)
+    Vrati (lazy) inicijalizirani Spotdl klijent ili None ako nije dostupan
+    (spotdl nije instaliran, nema credova...). Tada se koristi CLI.
+    """
+    global _SPOTDL, _SPOTDL_FAILED
 
-    tmp_dir.mkdir(parents=True, exist_ok=True)
+    with _SPOTDL_LOCK:
+        if _SPOTDL is not None or _SPOTDL_FAILED:
+            return _SPOTDL
+
+        try:
+            from spotdl import Spotdl
+
+            with open(get_spotify_credentials_path(), "r", encoding="utf-8") as f:
+                cred = json.load(f)
+            _SPOTDL = Spotdl(
+                client_id=cred["client_id"],
+                client_secret=cred["client_secret"],
+                downloader_settings={"output": str(_tmp_dir())},
+            )
+            logging.info("spotdl API klijent inicijaliziran (in-process download).")
+        except Exception as exc:  # noqa: BLE001
+            _SPOTDL_FAILED = True
+            logging.warning("spotdl API nije dostupan (%s) → koristim spotdl CLI.", exc)
+
+        return _SPOTDL
 
-    # Snapshot prije downloada
-    before_files = list_audio_files_recursive(tmp_dir)
-    logging.debug("  [DL] Audio fajlova u TMP prije: %d", len(before_files))
 
+def run_spotdl_cli(spotify_url: str, tmp_dir: Path) -> bool:
+    """
+    Pokreni spotdl CLI kao zaseban proces; True ako je završio s kodom 0.
+
+    Output se ne skuplja cijeli u memoriju: pozadinski thread čita ga liniju
+    po liniju i čuva samo zadnjih SPOTDL_OUTPUT_TAIL linija (za log greške).
+    Proces koji visi dulje od SPOTDL_TIMEOUT_SEC se ubija.
+    """
     cmd = [
         "spotdl",
         spotify_url,
@@ -274,52 +667,142 @@ def perform_download(task: TrackTask, base_path: Path, tmp_dir: Path) -> Optiona
         str(tmp_dir),
     ]
 
-    logging.debug("  [DL] CMD: %s", " ".join(cmd))
+    # join samo ako će se DEBUG zapis stvarno ispisati (poziva se po tracku)
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("  [DL] CMD: %s", shlex.join(cmd))
 
     try:
-        proc = subprocess.run(
+        proc = subprocess.Popen(
             cmd,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
-            check=False,
+            bufsize=1,
         )
     except FileNotFoundError:
         logging.error("  [DL-ERROR] spotdl nije pronađen u PATH-u.")
-        return None
+        return False
     except Exception as exc:  # noqa: BLE001
         logging.exception("  [DL-ERROR] Izuzetak pri pokretanju spotdl: %s", exc)
-        return None
+        return False
 
-    if proc.returncode != 0:
-        logging.error("  [DL-ERROR] spotdl vratio kod %s", proc.returncode)
-        logging.debug("  [DL-STDOUT] %s", proc.stdout.strip())
-        logging.debug("  [DL-STDERR] %s", proc.stderr.strip())
-        return None
+    tail: Deque[str] = collections.deque(maxlen=SPOTDL_OUTPUT_TAIL)
+
+    def _drain() -> None:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            tail.append(line.rstrip("\n"))
+
+    reader = threading.Thread(target=_drain, daemon=True)
+    reader.start()
+
+    try:
+        returncode = proc.wait(timeout=SPOTDL_TIMEOUT_SEC)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        reader.join(timeout=5)
+        logging.error("  [DL-ERROR] spotdl nije završio u %d s — prekinut.", SPOTDL_TIMEOUT_SEC)
+        logging.debug("  [DL-OUTPUT] %s", "\n".join(tail))
+        return False
+
+    reader.join(timeout=5)
+    if returncode != 0:
+        logging.error("  [DL-ERROR] spotdl vratio kod %s", returncode)
+        logging.debug("  [DL-OUTPUT] %s", "\n".join(tail))
+        return False
+    return True
+
+
+def run_spotdl_api(spotify_url: str, tmp_dir: Path) -> bool:
+    """
+    Skini track preko in-process spotdl klijenta u tmp_dir.
+
+    Spotdl drži jedan asyncio event loop i singleton Spotify klijent, pa se
+    pozivi serijaliziraju lockom (i output pattern se postavlja po pozivu).
+    """
+    sdl = get_spotdl_client()
+    if sdl is None:
+        return False
 
-    # Snapshot poslije downloada
-    after_files = list_audio_files_recursive(tmp_dir)
-    logging.debug("  [DL] Audio fajlova u TMP poslije: %d", len(after_files))
+    try:
+        with _SPOTDL_LOCK:
+            sdl.downloader.settings["output"] = str(tmp_dir / "{artists} - {title}.{output-ext}")
+            songs = sdl.search([spotify_url])
+            if not songs:
+                logging.error("  [DL-ERROR] spotdl nije pronašao track za URL: %s", spotify_url)
+                return False
+            _song, path = sdl.download(songs[0])
+    except Exception as exc:  # noqa: BLE001
+        logging.exception("  [DL-ERROR] Izuzetak u spotdl API downloadu: %s", exc)
+        return False
+
+    if path is None:
+        logging.error("  [DL-ERROR] spotdl API nije vratio fajl za URL: %s", spotify_url)
+        return False
+    return True
+
+
+def perform_download(
+    task: TrackTask,
+    base_path: Path,
+    tmp_dir: Path,
+    use_api: bool = False,
+) -> Optional[Path]:
+    """
+    Izvrši stvarni download preko spotdl-a za zadani task.
 
-    new_files = after_files - before_files
+    Ako je use_api=True (i spotdl paket je dostupan), koristi se in-process
+    spotdl klijent umjesto novog CLI procesa po tracku.
+
+    Vraća path do konačnog audio fajla u base_path ako uspije, inače None.
+    """
+    spotify_url = task.spotify_track_url
+    logging.info("  [DL] Pokrećem spotdl za URL: %s", spotify_url)
+
+    # Svaki download dobiva svoj (jedinstveni) poddirektorij u TMP-u, da se
+    # paralelni spotdl pozivi — i isti track iz dva batcha pod --concurrency —
+    # ne sudaraju na istom output patternu, before/after diffu i rmtree-u.
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    # Direktorij je nov i prazan, pa su svi audio fajlovi u njemu nakon
+    # downloada novi (nema snapshota "prije").
+    tmp_dir = Path(tempfile.mkdtemp(dir=tmp_dir, prefix=f"{task.spotify_id or 'track'}-"))
+
+    if use_api and get_spotdl_client() is not None:
+        ok = run_spotdl_api(spotify_url, tmp_dir)
+    else:
+        ok = run_spotdl_cli(spotify_url, tmp_dir)
+    if not ok:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return None
+
+    new_files = list_audio_files_recursive(tmp_dir)
+    logging.debug("  [DL] Audio fajlova u TMP poslije: %d", len(new_files))
     if not new_files:
         logging.error("  [DL-ERROR] Ne mogu pronaći novi audio fajl u %s nakon downloada.", tmp_dir)
-        logging.debug("  [DL-STDOUT] %s", proc.stdout.strip())
-        logging.debug("  [DL-STDERR] %s", proc.stderr.strip())
+        shutil.rmtree(tmp_dir, ignore_errors=True)
         return None
 
     # Ako ima više novih fajlova, uzmi onaj s najnovijim mtime
     downloaded_file = max(new_files, key=lambda p: p.stat().st_mtime)
     logging.info("  [DL] Detektirani novi audio fajl: %s", downloaded_file)
 
-    # Formiraj konačni target path
-    target_no_ext = base_path / task.target_rel_path()
+    final_target = place_downloaded_file(task, downloaded_file, base_path)
+    if final_target is not None:
+        # per-task TMP poddirektorij više ne treba
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return final_target
+
+
+def place_downloaded_file(task: TrackTask, downloaded_file: Path, base_path: Path) -> Optional[Path]:
+    """Premjesti skinuti fajl na konačni path taska; vraća taj path ili None."""
+    target_no_ext = base_path / task.target_rel_path
     target_dir = target_no_ext.parent
     target_dir.mkdir(parents=True, exist_ok=True)
     final_target = target_no_ext.with_suffix(downloaded_file.suffix)
 
     try:
-        shutil.move(str(downloaded_file), str(final_target))
+        move_into_place(downloaded_file, final_target)
     except Exception as exc:  # noqa: BLE001
         logging.exception("  [DL-ERROR] Ne mogu premjestiti %s u %s: %s", downloaded_file, final_target, exc)
         return None
@@ -328,6 +811,100 @@ def perform_download(task: TrackTask, base_path: Path, tmp_dir: Path) -> Optiona
     return final_target
 
 
+def _match_album_file(task: TrackTask, files_by_stem: Dict[str, Path]) -> Optional[Path]:
+    """
+    Nađi (i izbaci iz files_by_stem) fajl iz album downloada koji pripada tasku.
+    Prvo točno 'Artist - Title', zatim bilo koji '... - Title' (spotdl u ime
+    stavlja sve izvođače, npr. 'A, B - Title').
+    """
+    exact = task.target_filename.casefold()
+    if exact in files_by_stem:
+        return files_by_stem.pop(exact)
+
+    suffix = f" - {task.track_name}".casefold()
+    for stem in files_by_stem:
+        if stem.endswith(suffix):
+            return files_by_stem.pop(stem)
+    return None
+
+
+def perform_album_download(
+    album_id: str,
+    tasks: List[TrackTask],
+    base_path: Path,
+    tmp_dir: Path,
+) -> List[Tuple[TrackTask, Optional[Path]]]:
+    """
+    Skini cijeli album jednim spotdl pozivom (album URL) i rasporedi nove
+    fajlove po taskovima prema imenu 'Artist - Title'.
+
+    Taskovi čiji fajl nije prepoznat (ili ako album download padne) idu na
+    običan download po tracku, pa rezultat uvijek pokriva sve taskove.
+    """
+    album_url = f"https://open.spotify.com/album/{album_id}"
+    logging.info("  [DL] Pokrećem spotdl za album (%d trackova): %s", len(tasks), album_url)
+
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    album_tmp = Path(tempfile.mkdtemp(dir=tmp_dir, prefix=f"album_{album_id}-"))
+
+    files_by_stem: Dict[str, Path] = {}
+    if run_spotdl_cli(album_url, album_tmp):
+        # album_tmp je nov i prazan → sve u njemu je iz ovog downloada
+        new_files = list_audio_files_recursive(album_tmp)
+        files_by_stem = {p.stem.casefold(): p for p in new_files}
+        logging.info("  [DL] Album download: %d novih audio fajlova", len(files_by_stem))
+
+    results: List[Tuple[TrackTask, Optional[Path]]] = []
+    for task in tasks:
+        src = _match_album_file(task, files_by_stem)
+        if src is not None:
+            results.append((task, place_downloaded_file(task, src, base_path)))
+        else:
+            logging.warning(
+                "  [DL] '%s' nije pronađen u album downloadu → download po tracku.",
+                task.target_filename,
+            )
+            results.append((task, perform_download(task, base_path, tmp_dir)))
+
+    # ostatak (trackovi albuma koji nisu u batchu) ne treba
+    shutil.rmtree(album_tmp, ignore_errors=True)
+    return results
+
+
+def group_pending_by_album(
+    pending: List[TrackTask],
+) -> Tuple[Dict[str, List[TrackTask]], List[TrackTask]]:
+    """
+    Podijeli taskove za download na grupe po album_spotify_id (≥ 2 taska)
+    i ostatak koji ide pojedinačno.
+    """
+    by_album: Dict[str, List[TrackTask]] = {}
+    singles: List[TrackTask] = []
+    for task in pending:
+        if task.album_spotify_id:
+            by_album.setdefault(task.album_spotify_id, []).append(task)
+        else:
+            singles.append(task)
+
+    groups: Dict[str, List[TrackTask]] = {}
+    for album_id, group in by_album.items():
+        if len(group) >= 2:
+            groups[album_id] = group
+        else:
+            singles.extend(group)
+    return groups, singles
+
+
+def _download_single(
+    task: TrackTask,
+    base_path: Path,
+    tmp_dir: Path,
+    use_api: bool,
+) -> List[Tuple[TrackTask, Optional[Path]]]:
+    """perform_download u istom obliku rezultata kao perform_album_download."""
+    return [(task, perform_download(task, base_path, tmp_dir, use_api))]
+
+
 # ---------------------------------------------------------------------
 # Subcommand implementacije
 # ---------------------------------------------------------------------
@@ -335,7 +912,7 @@ def perform_download(task: TrackTask, base_path: Path, tmp_dir: Path) -> Optiona
 def cmd_track(args: argparse.Namespace) -> int:
     """Za sada: track se tretira kao mini batch s dummy metapodacima."""
     base_path = resolve_base_path(args.base_path)
-    tmp_dir = Path(get_downloader_tmp_dir())
+    tmp_dir = _tmp_dir()
     logging.info("[TRACK] mode")
     logging.info("  input: id=%r url=%r", getattr(args, "id", None), getattr(args, "url", None))
     logging.info("  base_path: %s", base_path)
@@ -352,7 +929,7 @@ def cmd_track(args: argparse.Namespace) -> int:
         track_name="Unknown Track",
     )
 
-    target_no_ext = base_path / task.target_rel_path()
+    target_no_ext = base_path / task.target_rel_path
     existing = find_existing_audio(target_no_ext)
 
     total = 1
@@ -368,7 +945,7 @@ def cmd_track(args: argparse.Namespace) -> int:
             logging.info("  [DRY-RUN] AUDIO NE POSTOJI → ovdje bi išao download.")
             skipped += 1
         else:
-            result = perform_download(task, base_path, tmp_dir)
+            result = perform_download(task, base_path, tmp_dir, args.spotdl_api)
             if result is not None:
                 downloaded += 1
             else:
@@ -460,7 +1037,7 @@ def cmd_batch(args: argparse.Namespace) -> int:
     """Batch download iz JSON liste s progress barom."""
     base_path = resolve_base_path(args.base_path)
     batch_path = Path(args.json).expanduser()
-    tmp_dir = Path(get_downloader_tmp_dir())
+    tmp_dir = _tmp_dir()
     logging.info("[BATCH] mode")
     logging.info("  batch JSON: %s", batch_path)
     logging.info("  base_path: %s", base_path)
@@ -469,44 +1046,42 @@ def cmd_batch(args: argparse.Namespace) -> int:
         logging.error("Batch JSON ne postoji: %s", batch_path)
         return 1
 
+    tasks: List[TrackTask] = []
     try:
-        with batch_path.open("r", encoding="utf-8") as f:
-            data: Dict[str, Any] = json.load(f)
-    except Exception as exc:  # noqa: BLE001
+        with batch_path.open("rb") as f:
+            for idx, item in enumerate(iter_batch_items(f), start=1):
+                # jedna set provjera umjesto try/except KeyError po zapisu
+                if not isinstance(item, dict):
+                    logging.warning("Preskačem neispravan zapis #%d (nije JSON objekt).", idx)
+                    continue
+                if not REQUIRED_BATCH_KEYS <= item.keys():
+                    missing = ", ".join(sorted(REQUIRED_BATCH_KEYS - item.keys()))
+                    logging.warning("Preskačem neispravan zapis #%d (nedostaje ključ %s).", idx, missing)
+                    continue
+
+                get = item.get
+                task = TrackTask(
+                    spotify_id=item["spotify_id"],
+                    spotify_url=get("spotify_url"),
+                    # artist/album se ponavljaju za svaki track albuma → interniraj
+                    artist=_intern(item["artist"]),
+                    album=_intern(item["album"]),
+                    album_year=get("album_year"),
+                    track_name=item["track_name"],
+                    disc_number=get("disc_number"),
+                    track_number=get("track_number"),
+                    album_spotify_id=get("album_spotify_id"),
+                )
+                tasks.append(task)
+    except json.JSONDecodeError as exc:
         logging.exception("Ne mogu učitati batch JSON: %s", exc)
         return 1
-
-    tracks_data = data.get("tracks", [])
-    if not isinstance(tracks_data, list):
-        logging.error("Neispravan format batch JSON-a: 'tracks' nije lista.")
+    except ValueError as exc:
+        logging.error("Neispravan format batch JSON-a: %s", exc)
+        return 1
+    except Exception as exc:  # noqa: BLE001
+        logging.exception("Ne mogu učitati batch JSON: %s", exc)
         return 1
-
-    tasks: List[TrackTask] = []
-    for idx, item in enumerate(tracks_data, start=1):
-        try:
-            spotify_id = item["spotify_id"]
-            artist = item["artist"]
-            album = item["album"]
-            album_year = item.get("album_year")
-            track_name = item["track_name"]
-            spotify_url = item.get("spotify_url")
-            disc_number = item.get("disc_number")
-            track_number = item.get("track_number")
-        except KeyError as ke:
-            logging.warning("Preskačem neispravan zapis #%d (nedostaje ključ %s).", idx, ke)
-            continue
-
-        task = TrackTask(
-            spotify_id=spotify_id,
-            spotify_url=spotify_url,
-            artist=artist,
-            album=album,
-            album_year=album_year,
-            track_name=track_name,
-            disc_number=disc_number,
-            track_number=track_number,
-        )
-        tasks.append(task)
 
     start = time.time()
     total = 0
@@ -523,14 +1098,64 @@ def cmd_batch(args: argparse.Namespace) -> int:
         logging.info("Planirano taskova: %d, max-tracks limit: %d", len(tasks), max_tracks)
 
         processed = 0
+        pending: List[TrackTask] = []
+        pending_targets: Set[str] = set()
+        pending_ids: Set[str] = set()
+        # jedan scandir po album direktoriju umjesto stat-a po tasku i ekstenziji
+        album_dir_cache: Dict[str, Set[str]] = {}
+        abs_album_dirs: Dict[Path, str] = {}
+        # seen cache iz prošlih runova: jedan SELECT na početku
+        seen_conn = open_seen_cache()
+        seen = load_seen(seen_conn)
+
+        # dry-run samo izvještava: jedan os.walk cijele kolekcije umjesto
+        # listanja direktorija po albumu
+        walked = bool(args.dry_run)
+        if walked:
+            t0 = time.time()
+            album_dir_cache.update(walk_audio_listings(base_path))
+            logging.info(
+                "Dry-run: izlistano %d foldera s audio fajlovima za %.2fs",
+                len(album_dir_cache),
+                time.time() - t0,
+            )
+        elif args.scan_jobs > 1:
+            # unaprijed izlistaj album foldere prvih max_tracks taskova;
+            # ostatak (ako ga bude) se lista lijeno u petlji
+            for task in tasks[:max_tracks]:
+                album_dir = task.album_dir
+                if album_dir not in abs_album_dirs:
+                    abs_album_dirs[album_dir] = os.fspath(base_path / album_dir)
+            t0 = time.time()
+            album_dir_cache.update(
+                prefetch_dir_listings(list(abs_album_dirs.values()), args.scan_jobs)
+            )
+            logging.info(
+                "Izlistano %d album foldera (--scan-jobs=%d) za %.2fs",
+                len(album_dir_cache),
+                args.scan_jobs,
+                time.time() - t0,
+            )
+
         for i, task in enumerate(tasks, start=1):
-            if processed >= max_tracks:
+            if processed + len(pending) >= max_tracks:
                 logging.info("Dosegnut max-tracks=%d, prekidam.", max_tracks)
                 break
 
-            rel_path = task.target_rel_path()
-            target_no_ext = base_path / rel_path
-            existing = find_existing_audio(target_no_ext)
+            # apsolutni album folder računa se jednom po albumu; ime fajla se
+            # samo nadoda stringom (bez novih Path objekata po tasku)
+            album_dir = task.album_dir
+            album_dir_str = abs_album_dirs.get(album_dir)
+            if album_dir_str is None:
+                album_dir_str = os.fspath(base_path / album_dir)
+                abs_album_dirs[album_dir] = album_dir_str
+            target_no_ext = album_dir_str + os.sep + task.target_filename
+
+            existing = lookup_seen(seen, task.spotify_id, target_no_ext)
+            if existing is None:
+                existing = find_existing_audio_cached(target_no_ext, album_dir_cache, walked)
+                if existing is not None and not args.dry_run:
+                    remember_seen(seen_conn, task.spotify_id, existing)
 
             logging.info(
                 "[TASK %d/%d] %s - %s → %s (spotify_id=%s)",
@@ -545,22 +1170,79 @@ def cmd_batch(args: argparse.Namespace) -> int:
             if existing is not None:
                 logging.info("  [EXISTS] Već postoji audio fajl: %s", existing)
                 skipped += 1
+            elif args.dry_run:
+                logging.info("  [DRY-RUN] AUDIO NE POSTOJI → ovdje bi išao download.")
+                skipped += 1
+            elif target_no_ext in pending_targets or (
+                task.spotify_id and task.spotify_id in pending_ids
+            ):
+                # isti track već čeka download u ovom runu (serijska petlja bi
+                # ga nakon prvog downloada vidjela kao [EXISTS])
+                logging.info("  [DUPLIKAT] Isti track je već na redu za download, preskačem.")
+                skipped += 1
             else:
-                if args.dry_run:
-                    logging.info("  [DRY-RUN] AUDIO NE POSTOJI → ovdje bi išao download.")
-                    skipped += 1
-                else:
-                    result = perform_download(task, base_path, tmp_dir)
-                    if result is not None:
-                        downloaded += 1
-                    else:
-                        failed += 1
+                # download ide kasnije, kroz pool workera
+                pending.append(task)
+                pending_targets.add(target_no_ext)
+                if task.spotify_id:
+                    pending_ids.add(task.spotify_id)
+                continue
 
             processed += 1
             total += 1
             # update progress bar
             render_progress(processed, effective_total)
 
+        if pending:
+            jobs = max(1, args.jobs)
+            logging.info("Za download: %d taskova, paralelnih poslova (--jobs): %d", len(pending), jobs)
+            # Svaki task je zaseban spotdl subprocess, pa je thread pool dovoljan.
+            # (S --spotdl-api se sami spotdl pozivi serijaliziraju, v. run_spotdl_api.)
+            groups: Dict[str, List[TrackTask]] = {}
+            singles = pending
+            if args.by_album and args.spotdl_api:
+                logging.info("--by-album se ignorira uz --spotdl-api (nema startup troška po tracku).")
+            elif args.by_album:
+                groups, singles = group_pending_by_album(pending)
+                logging.info(
+                    "Grupirano po albumu: %d album downloada, %d pojedinačnih.",
+                    len(groups),
+                    len(singles),
+                )
+
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                futures = {
+                    executor.submit(perform_album_download, album_id, group, base_path, tmp_dir): group
+                    for album_id, group in groups.items()
+                }
+                for task in singles:
+                    future = executor.submit(_download_single, task, base_path, tmp_dir, args.spotdl_api)
+                    futures[future] = [task]
+
+                for future in as_completed(futures):
+                    try:
+                        results = future.result()
+                    except Exception as exc:  # noqa: BLE001
+                        logging.exception("  [DL-ERROR] Neočekivana greška u workeru: %s", exc)
+                        results = [(task, None) for task in futures[future]]
+
+                    for task, result in results:
+                        if result is not None:
+                            downloaded += 1
+                            remember_seen(seen_conn, task.spotify_id, result)
+                        else:
+                            failed += 1
+
+                        processed += 1
+                        total += 1
+                        render_progress(processed, effective_total)
+
+        if seen_conn is not None:
+            try:
+                seen_conn.close()
+            except sqlite3.Error as exc:
+                logging.debug("Ne mogu zatvoriti seen cache: %s", exc)
+
         if effective_total > 0:
             # završi liniju nakon progress bara
             print("", file=sys.stdout)
@@ -582,14 +1264,14 @@ def cmd_info(args: argparse.Namespace) -> int:  # noqa: ARG001
     print("=== Downloader info ===")
 
     batch_dir = Path(get_downloader_batch_dir())
-    tmp_dir = Path(get_downloader_tmp_dir())
-    log_dir = Path(get_downloader_log_dir())
+    tmp_dir = _tmp_dir()
+    log_dir = _log_dir()
 
     print(f"BATCH_DIR:             {batch_dir}")
     print(f"TMP_DIR:               {tmp_dir}")
     print(f"LOG_DIR:               {log_dir}")
 
-    env_base = get_default_music_root()
+    env_base = _music_root()
     print(f"Env ZMUSIC_MUSIC_ROOT: {env_base if env_base is not None else '(nije postavljen)'}")
 
     return 0
@@ -14,12 +14,22 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from modules.apicache import TTL_ARTIST_ID, TTL_TRACK, ApiCache, make_key, open_cache, ttl_for_url
+from utils.json_io import write_json
 
 # Pretpostavka: postoji modules.config s putanjama
 try:
@@ -31,6 +41,18 @@ log = logging.getLogger(__name__)
 
 SPOTIFY_API_BASE = "https://api.spotify.com/v1"
 
+# Paralelni dohvat albuma: držimo se ispod Spotify rate limita
+ALBUM_FETCH_WORKERS = 8
+# Gornja granica za --workers (ujedno veličina HTTP connection poola)
+MAX_ALBUM_FETCH_WORKERS = 16
+# Koliko puta ponoviti request nakon 429 / 5xx odgovora
+MAX_RETRIES = 6
+# Gornja granica čekanja (s) za backoff kad Spotify ne pošalje Retry-After
+MAX_BACKOFF_SEC = 30
+# Ciljani broj requestova u sekundi prema Spotifyju (ispod ~25 req/s limita
+# app tokena); može se promijeniti env varijablom ZMUSIC_SPOTIFY_RPS.
+DEFAULT_SPOTIFY_RPS = 20.0
+
 
 # =====================================================
 #                    MODELI
@@ -46,6 +68,7 @@ class TrackTask:
     album: str
     year: int
     title: str
+    album_id: Optional[str] = None
 
     def to_json(self) -> Dict[str, Any]:
         return {
@@ -53,6 +76,7 @@ class TrackTask:
             "spotify_id": self.spotify_id,
             "artist": self.artist,
             "album": self.album,
+            "album_id": self.album_id,
             "year": self.year,
             "title": self.title,
         }
@@ -90,7 +114,12 @@ def resolve_output_path(out_arg: Optional[str], suffix: str) -> Path:
     return batch_dir / f"{suffix}_{ts}.json"
 
 
-def write_batch(tasks: List[TrackTask], out_path: Path, info: bool = False) -> None:
+def write_batch(
+    tasks: List[TrackTask],
+    out_path: Path,
+    info: bool = False,
+    pretty: bool = False,
+) -> None:
     # Generiraj JSON kompatibilan i s našim generatorom i s postojećim downloaderom.
     # "tasks"  -> naš visoko-razinski format (type/spotify_id/artist/album/year/title)
     # "tracks" -> format koji očekuje modules.download (spotify_id, artist, album, album_year, track_name, ...)
@@ -103,14 +132,16 @@ def write_batch(tasks: List[TrackTask], out_path: Path, info: bool = False) -> N
                 "album": t.album,
                 "album_year": t.year or None,
                 "track_name": t.title,
+                # downloader ga koristi za --by-album (jedan spotdl po albumu)
+                "album_spotify_id": t.album_id,
             }
             for t in tasks
         ],
     }
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    # kompaktni JSON (orjson ako je dostupan) u jednom write-u; indent samo uz --pretty
+    write_json(out_path, data, pretty=pretty)
 
     if info:
         log.info("Zapisao batch JSON: %s", out_path)
@@ -138,7 +169,53 @@ def _resolve_token_path() -> Path:
 
 
 
-def load_spotify_token() -> Dict[str, Any]:
+# Token i HTTP session držimo na razini modula: token se čita s diska samo
+# jednom (i ponovno kad istekne ili dobijemo 401), a session čuva TCP/TLS
+# konekcije otvorenima između poziva (keep-alive).
+_TOKEN_CACHE: Optional[Dict[str, Any]] = None
+
+
+def _build_session() -> requests.Session:
+    """Session s connection poolom dovoljnim za sve workere i retryjem za 5xx/mrežne greške."""
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        # 429 i 5xx rješava _send() (Retry-After / backoff), ovdje samo
+        # mrežne greške (connect/read)
+        status_forcelist=(),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=MAX_ALBUM_FETCH_WORKERS,
+        max_retries=retry,
+        # višak threadova čeka slobodnu konekciju umjesto da otvara nove
+        # (koje bi se nakon requesta odbacile) — svaka konekcija se reusa
+        pool_block=True,
+    )
+    session.mount("https://", adapter)
+    session.headers.update({"Accept": "application/json", "Accept-Encoding": "gzip"})
+    return session
+
+
+_SESSION = _build_session()
+
+
+def _token_expired(token: Dict[str, Any]) -> bool:
+    expires_at = token.get("expires_at")
+    if not isinstance(expires_at, (int, float)):
+        return False
+    # mala margina da token ne istekne usred requesta
+    return expires_at - 30 <= time.time()
+
+
+def load_spotify_token(force: bool = False) -> Dict[str, Any]:
+    global _TOKEN_CACHE
+    if _TOKEN_CACHE is not None and not force and not _token_expired(_TOKEN_CACHE):
+        return _TOKEN_CACHE
+
     token_path = _resolve_token_path()
     if not token_path.is_file():
         raise SystemExit(
@@ -151,16 +228,130 @@ def load_spotify_token() -> Dict[str, Any]:
 
     if "access_token" not in token:
         raise SystemExit(f"Spotify token JSON nema 'access_token' ključ: {token_path}")
+
+    _TOKEN_CACHE = token
     return token
 
 
-def spotify_get(path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    token = load_spotify_token()
-    headers = {
-        "Authorization": f"Bearer {token['access_token']}",
-    }
-    url = f"{SPOTIFY_API_BASE}{path}"
-    resp = requests.get(url, headers=headers, params=params or {}, timeout=15)
+class TokenBucket:
+    """
+    Jednostavan token-bucket limiter (thread-safe).
+
+    Puni se brzinom `rate` tokena/s do najviše `burst`; acquire() uzme jedan
+    token ili spava dok se ne napuni. Dijele ga svi workeri u procesu.
+    """
+
+    def __init__(self, rate: float = DEFAULT_SPOTIFY_RPS, burst: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = burst if burst is not None else rate
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _rps_from_env() -> float:
+    raw = os.environ.get("ZMUSIC_SPOTIFY_RPS")
+    if not raw:
+        return DEFAULT_SPOTIFY_RPS
+    try:
+        rps = float(raw)
+    except ValueError:
+        log.warning("Neispravan ZMUSIC_SPOTIFY_RPS=%r, koristim %.0f.", raw, DEFAULT_SPOTIFY_RPS)
+        return DEFAULT_SPOTIFY_RPS
+    return rps if rps > 0 else DEFAULT_SPOTIFY_RPS
+
+
+_RATE_LIMITER = TokenBucket(_rps_from_env())
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Eksponencijalni backoff s jitterom: ~1, 2, 4, ... s, max MAX_BACKOFF_SEC."""
+    return min(2 ** attempt, MAX_BACKOFF_SEC) * random.uniform(0.5, 1.0)
+
+
+def _send(url: str, params: Optional[Dict[str, Any]], force_token: bool = False) -> requests.Response:
+    """
+    Jedan GET s aktualnim tokenom.
+
+    Na 429 poštuje Retry-After (ili eksponencijalni backoff ako ga nema),
+    na 5xx čeka po backoffu; najviše MAX_RETRIES ponavljanja.
+    """
+    token = load_spotify_token(force=force_token)
+    for attempt in range(MAX_RETRIES + 1):
+        # preventivno ograničenje brzine, da 429 uopće ne dođe
+        _RATE_LIMITER.acquire()
+        resp = _SESSION.get(
+            url,
+            headers={"Authorization": f"Bearer {token['access_token']}"},
+            params=params or {},
+            timeout=15,
+        )
+        status = resp.status_code
+        if status != 429 and status < 500:
+            break
+        if attempt == MAX_RETRIES:
+            log.error("Spotify %s i nakon %d pokušaja: %s", status, MAX_RETRIES, url)
+            break
+
+        if status == 429:
+            retry_after = resp.headers.get("Retry-After")
+            try:
+                wait = float(retry_after) if retry_after is not None else _backoff_delay(attempt)
+            except ValueError:
+                wait = _backoff_delay(attempt)
+            log.warning("Spotify rate limit (429), čekam %.1f s...", wait)
+        else:
+            wait = _backoff_delay(attempt)
+            log.warning("Spotify greška %s, pokušaj %d/%d za %.1f s...", status, attempt + 1, MAX_RETRIES, wait)
+        time.sleep(wait)
+    return resp
+
+
+# On-disk TTL cache odgovora (modules.apicache); otvara se lijeno pri prvom
+# requestu, a --no-cache ga isključuje.
+_API_CACHE: Optional[ApiCache] = None
+_API_CACHE_ENABLED = True
+_API_CACHE_LOCK = threading.Lock()
+
+
+def _get_api_cache() -> Optional[ApiCache]:
+    global _API_CACHE, _API_CACHE_ENABLED
+    if not _API_CACHE_ENABLED:
+        return None
+    with _API_CACHE_LOCK:
+        if _API_CACHE is None:
+            _API_CACHE = open_cache()
+            if _API_CACHE is None:
+                _API_CACHE_ENABLED = False
+        return _API_CACHE
+
+
+def _spotify_get_url(url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """GET na punu Spotify URL (koristi se i za 'next' stranice kod paginga)."""
+    cache = _get_api_cache()
+    key = make_key(url, params) if cache is not None else ""
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    resp = _send(url, params)
+
+    if resp.status_code == 401:
+        # token je možda u međuvremenu osvježen na disku -> pročitaj ponovno i probaj još jednom
+        resp = _send(url, params, force_token=True)
 
     if resp.status_code == 401:
         raise SystemExit(
@@ -171,7 +362,14 @@ def spotify_get(path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str,
             f"Spotify API error {resp.status_code}: {resp.text[:200]}"
         )
 
-    return resp.json()
+    data = resp.json()
+    if cache is not None:
+        cache.put(key, data, ttl_for_url(url))
+    return data
+
+
+def spotify_get(path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return _spotify_get_url(f"{SPOTIFY_API_BASE}{path}", params=params)
 
 
 # ---------- Spotify helperi ----------
@@ -199,7 +397,21 @@ def get_artist_id(artist: Optional[str], artist_id: Optional[str]) -> str:
         return artist_id
     if not artist:
         raise SystemExit("Potrebno je zadati --artist ili --artist-id.")
-    return search_artist_by_name(artist).get("id")
+
+    # ime → ID memoiziramo u API cacheu (30 dana), da ponovljeni runovi za
+    # istog artista ne idu na /search
+    cache = _get_api_cache()
+    key = make_key("artist-id:" + artist.strip().casefold())
+    if cache is not None:
+        cached_id = cache.get(key)
+        if cached_id:
+            log.info("Artist ID iz cachea: %s (ID=%s)", artist, cached_id)
+            return cached_id
+
+    found_id = search_artist_by_name(artist).get("id")
+    if cache is not None and found_id:
+        cache.put(key, found_id, TTL_ARTIST_ID)
+    return found_id
 
 
 def get_artist_albums(artist_id: str, include_singles: bool) -> List[Dict[str, Any]]:
@@ -211,14 +423,18 @@ def get_artist_albums(artist_id: str, include_singles: bool) -> List[Dict[str, A
     }
     url_path = f"/artists/{artist_id}/albums"
 
-    # jednostavna implementacija: jedna stranica (50) je najčešće dosta,
-    # ako bude trebalo, kasnije ćemo dodati full paging
+    # full paging: Spotify vraća max 50 albuma po stranici + 'next' URL
     data = spotify_get(url_path, params=params)
-    for item in data.get("items", []):
-        alb_id = item.get("id")
-        if not alb_id:
-            continue
-        albums[alb_id] = item
+    while True:
+        for item in data.get("items", []):
+            alb_id = item.get("id")
+            if not alb_id:
+                continue
+            albums[alb_id] = item
+        next_url = data.get("next")
+        if not next_url:
+            break
+        data = _spotify_get_url(next_url)
 
     result = list(albums.values())
     log.info("Našao %d albuma za artist_id=%s", len(result), artist_id)
@@ -235,11 +451,44 @@ def parse_year(release_date: str) -> int:
 
 
 def get_album_tracks(album_id: str) -> Dict[str, Any]:
-    """Vrati full album JSON (uklj. tracks) za zadani album ID."""
-    data = spotify_get(f"/albums/{album_id}")
+    """Vrati full album JSON (uklj. tracks) za zadani album ID.
+
+    /albums/{id} vraća samo prvu stranicu trackova (max 50), pa ostale
+    stranice dohvaćamo preko 'next' i dodajemo u tracks.items.
+    """
+    return _complete_album_tracks(spotify_get(f"/albums/{album_id}"))
+
+
+def _complete_album_tracks(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Dohvati preostale stranice trackova albuma ('next') u tracks.items."""
+    tracks = data.get("tracks") or {}
+    items = tracks.get("items") or []
+    next_url = tracks.get("next")
+    while next_url:
+        page = _spotify_get_url(next_url)
+        items.extend(page.get("items", []))
+        next_url = page.get("next")
+    tracks["items"] = items
+    data["tracks"] = tracks
     return data
 
 
+# Spotify /albums?ids= prima najviše 20 ID-eva po requestu
+ALBUMS_PER_REQUEST = 20
+
+
+def get_albums_tracks(album_ids: List[str]) -> List[Dict[str, Any]]:
+    """Kao get_album_tracks, ali za do 20 albuma jednim requestom (/albums?ids=)."""
+    data = spotify_get("/albums", params={"ids": ",".join(album_ids)})
+    albums: List[Dict[str, Any]] = []
+    for album_id, album in zip(album_ids, data.get("albums") or []):
+        if album is None:
+            log.warning("Spotify nema album s ID-em %s, preskačem.", album_id)
+            continue
+        albums.append(_complete_album_tracks(album))
+    return albums
+
+
 def build_tasks_for_album(album_data: Dict[str, Any]) -> List[TrackTask]:
     album_name = album_data.get("name", "")
     release_date = album_data.get("release_date", "")
@@ -265,6 +514,7 @@ def build_tasks_for_album(album_data: Dict[str, Any]) -> List[TrackTask]:
                 album=album_name,
                 year=year,
                 title=title,
+                album_id=album_data.get("id"),
             )
         )
     log.info(
@@ -321,6 +571,15 @@ def choose_album_by_name(
 
 
 def resolve_track_by_search(artist: str, track: str) -> Dict[str, Any]:
+    # (artist, naslov) → track JSON memoiziramo 7 dana, da ponovljeni
+    # lookupi istih naslova ne idu na /search
+    cache = _get_api_cache()
+    key = make_key("search-track:" + artist.strip().casefold(), {"track": track.strip().casefold()})
+    if cache is not None:
+        cached = cache.get(key)
+        if cached:
+            return cached
+
     query = f"track:{track} artist:{artist}"
     data = spotify_get(
         "/search",
@@ -336,9 +595,57 @@ def resolve_track_by_search(artist: str, track: str) -> Dict[str, Any]:
         chosen.get("name"),
         chosen.get("id"),
     )
+    if cache is not None:
+        cache.put(key, chosen, TTL_TRACK)
     return chosen
 
 
+# Spotify /tracks?ids= prima najviše 50 ID-eva po requestu
+TRACKS_PER_REQUEST = 50
+
+
+def get_tracks(track_ids: List[str]) -> List[Dict[str, Any]]:
+    """Dohvati više trackova po ID-u, do 50 po requestu (/tracks?ids=)."""
+    tracks: List[Dict[str, Any]] = []
+    for i in range(0, len(track_ids), TRACKS_PER_REQUEST):
+        chunk = track_ids[i:i + TRACKS_PER_REQUEST]
+        data = spotify_get("/tracks", params={"ids": ",".join(chunk)})
+        for track_id, track in zip(chunk, data.get("tracks") or []):
+            if track is None:
+                log.warning("Spotify nema track s ID-em %s, preskačem.", track_id)
+                continue
+            tracks.append(track)
+    return tracks
+
+
+def build_task_for_track(track_data: Dict[str, Any]) -> Optional[TrackTask]:
+    """TrackTask iz Spotify track JSON-a (None ako nema ID ili naziv)."""
+    album = track_data.get("album", {}) or {}
+    album_name = album.get("name", "")
+    release_date = album.get("release_date", "")
+    year = parse_year(release_date)
+
+    artists = track_data.get("artists", []) or []
+    if artists:
+        artist_name = artists[0].get("name", "")
+    else:
+        artist_name = ""
+
+    track_id = track_data.get("id")
+    title = track_data.get("name", "")
+    if not track_id or not title:
+        return None
+
+    return TrackTask(
+        spotify_id=track_id,
+        artist=artist_name,
+        album=album_name,
+        year=year,
+        title=title,
+        album_id=album.get("id"),
+    )
+
+
 # =====================================================
 #                    HANDLERS
 # =====================================================
@@ -350,17 +657,30 @@ def handle_collection(args: argparse.Namespace) -> None:
     artist_id = get_artist_id(args.artist, args.artist_id)
     albums = get_artist_albums(artist_id, include_singles=args.include_singles)
 
-    tasks: List[TrackTask] = []
-    for alb in albums:
-        alb_id = alb.get("id")
-        if not alb_id:
-            continue
-        # Dohvati full album s trackovima
-        album_data = get_album_tracks(alb_id)
-        tasks.extend(build_tasks_for_album(album_data))
+    # prazni ID-evi van, ponovljeni samo jednom (redoslijed se čuva)
+    album_ids = list(dict.fromkeys(alb.get("id") for alb in albums if alb.get("id")))
+
+    # Dohvati full albume s trackovima po 20 u requestu (/albums?ids=), a
+    # chunkove paralelno (mrežni I/O); executor.map čuva redoslijed pa je
+    # batch JSON deterministički.
+    chunks = [
+        album_ids[i:i + ALBUMS_PER_REQUEST]
+        for i in range(0, len(album_ids), ALBUMS_PER_REQUEST)
+    ]
+    workers = max(1, min(args.workers, MAX_ALBUM_FETCH_WORKERS, len(chunks)))
+    if workers == 1:
+        chunk_results = [get_albums_tracks(chunk) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            chunk_results = list(executor.map(get_albums_tracks, chunks))
+    album_datas = [album for chunk in chunk_results for album in chunk]
+
+    tasks: List[TrackTask] = [
+        task for album_data in album_datas for task in build_tasks_for_album(album_data)
+    ]
 
     out_path = resolve_output_path(args.out, "artist_collection")
-    write_batch(tasks, out_path, info=args.info)
+    write_batch(tasks, out_path, info=args.info, pretty=args.pretty)
 
 
 def handle_album(args: argparse.Namespace) -> None:
@@ -386,21 +706,31 @@ def handle_album(args: argparse.Namespace) -> None:
     tasks = build_tasks_for_album(album_data)
 
     out_path = resolve_output_path(args.out, "artist_album")
-    write_batch(tasks, out_path, info=args.info)
+    write_batch(tasks, out_path, info=args.info, pretty=args.pretty)
 
 
 def handle_track(args: argparse.Namespace) -> None:
-    """Generate batch za JEDAN track."""
+    """Generate batch za JEDAN (ili više) trackova.
+
+    --track-id i --track se mogu zadati više puta: ID-evi se dohvaćaju
+    skupno (/tracks?ids=), a search po naslovima ide paralelno (dijeli
+    cache i rate limiter s ostatkom modula).
+    """
+
+    track_ids: List[str] = args.track_id or []
+    titles: List[str] = args.track or []
 
-    if not args.track_id and not (args.artist or args.artist_id) and not args.track:
+    if not track_ids and not titles:
         raise SystemExit(
             "Za 'track' mod zadati ili --track-id ili kombinaciju "
             "--artist/--artist-id + --track."
         )
 
-    if args.track_id:
-        track_data = spotify_get(f"/tracks/{args.track_id}")
-    else:
+    track_datas: List[Dict[str, Any]] = []
+    if track_ids:
+        track_datas.extend(get_tracks(track_ids))
+
+    if titles:
         # koristimo artist ime za search; ako je zadano samo artist_id,
         # moramo resolve-ati ime artista
         artist_name = args.artist
@@ -411,38 +741,21 @@ def handle_track(args: argparse.Namespace) -> None:
         if not artist_name:
             raise SystemExit("Za track search potrebno je ime artista (--artist).")
 
-        track_data = resolve_track_by_search(artist_name, args.track)
-
-    album = track_data.get("album", {}) or {}
-    album_name = album.get("name", "")
-    release_date = album.get("release_date", "")
-    year = parse_year(release_date)
-
-    artists = track_data.get("artists", []) or []
-    if artists:
-        artist_name = artists[0].get("name", "")
-    else:
-        artist_name = ""
-
-    track_id = track_data.get("id")
-    title = track_data.get("name", "")
+        workers = max(1, min(ALBUM_FETCH_WORKERS, len(titles)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            track_datas.extend(
+                executor.map(lambda title: resolve_track_by_search(artist_name, title), titles)
+            )
 
     tasks: List[TrackTask] = []
-    if track_id and title:
-        tasks.append(
-            TrackTask(
-                spotify_id=track_id,
-                artist=artist_name,
-                album=album_name,
-                year=year,
-                title=title,
-            )
-        )
-    else:
-        raise SystemExit("Dobiveni track nema ID ili naziv.")
+    for track_data in track_datas:
+        task = build_task_for_track(track_data)
+        if task is None:
+            raise SystemExit("Dobiveni track nema ID ili naziv.")
+        tasks.append(task)
 
     out_path = resolve_output_path(args.out, "artist_track")
-    write_batch(tasks, out_path, info=args.info)
+    write_batch(tasks, out_path, info=args.info, pretty=args.pretty)
 
 
 # =====================================================
@@ -459,6 +772,12 @@ def build_parser() -> argparse.ArgumentParser:
         ),
     )
 
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ne koristi lokalni cache Spotify API odgovora (data/cache).",
+    )
+
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     # collection
@@ -470,8 +789,15 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Uključi i singlove (release type 'single').",
     )
+    p_coll.add_argument(
+        "--workers",
+        type=int,
+        default=ALBUM_FETCH_WORKERS,
+        help=f"Broj paralelnih dohvata albuma (default: {ALBUM_FETCH_WORKERS}, max: {MAX_ALBUM_FETCH_WORKERS}).",
+    )
     p_coll.add_argument("--out", type=str, help="Putanja do output batch JSON-a.")
     p_coll.add_argument("--info", action="store_true", help="Ispiši sažetak.")
+    p_coll.add_argument("--pretty", action="store_true", help="Formatiraj batch JSON s uvlakama (sporije, veći fajl).")
     p_coll.set_defaults(func=handle_collection)
 
     # album
@@ -482,16 +808,18 @@ def build_parser() -> argparse.ArgumentParser:
     p_album.add_argument("--album-id", type=str, help="Spotify album ID.")
     p_album.add_argument("--out", type=str, help="Putanja do output batch JSON-a.")
     p_album.add_argument("--info", action="store_true", help="Ispiši sažetak.")
+    p_album.add_argument("--pretty", action="store_true", help="Formatiraj batch JSON s uvlakama (sporije, veći fajl).")
     p_album.set_defaults(func=handle_album)
 
     # track
     p_track = subparsers.add_parser("track", help="Jedna pjesma artista.")
     p_track.add_argument("--artist", type=str, help="Ime artista (Spotify search).")
     p_track.add_argument("--artist-id", type=str, help="Spotify artist ID.")
-    p_track.add_argument("--track", type=str, help="Naziv pjesme.")
-    p_track.add_argument("--track-id", type=str, help="Spotify track ID.")
+    p_track.add_argument("--track", type=str, action="append", help="Naziv pjesme (može više puta).")
+    p_track.add_argument("--track-id", type=str, action="append", help="Spotify track ID (može više puta).")
     p_track.add_argument("--out", type=str, help="Putanja do output batch JSON-a.")
     p_track.add_argument("--info", action="store_true", help="Ispiši sažetak.")
+    p_track.add_argument("--pretty", action="store_true", help="Formatiraj batch JSON s uvlakama (sporije, veći fajl).")
     p_track.set_defaults(func=handle_track)
 
     return parser
@@ -506,6 +834,10 @@ def main(argv: Optional[list[str]] = None) -> int:
         parser.print_help()
         return 1
 
+    global _API_CACHE_ENABLED
+    if args.no_cache:
+        _API_CACHE_ENABLED = False
+
     args.func(args)
     return 0
 
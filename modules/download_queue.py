@@ -4,9 +4,11 @@ Ovaj modul je *orkestrator* iznad postojećeg `modules.download`.
 
 - NE skida ništa sam, stvarni download radi `modules.download` (tvoj postojeći core).
 - Čita batch JSON-ove koje generiraju download_gen_* skripte (ključ "tracks").
-- Za svaki batch poziva:
+- Za svaki batch poziva (u istom procesu, preko modules.download.main):
 
-    python -m modules.download batch --json <file> --base-path <root> --info [--dry-run]
+    modules.download batch --json <file> --base-path <root> --info [--dry-run]
+
+  Uz env ZMUSIC_QUEUE_SUBPROCESS=1 to je zaseban `python -m modules.download` proces.
 
 Podržani modovi:
   - queue  → odradi sve pending batch JSON-ove iz batch direktorija
@@ -16,32 +18,42 @@ Argumenti:
   - --path         → gdje na disku spremati glazbu (prosljeđuje se kao --base-path)
   - --dry-run      → ne skidaj ništa, samo proslijedi --dry-run na modules.download
   - --delete-done  → nakon uspješnog batcha obriši JSON umjesto da ga arhiviraš
+  - --concurrency  → koliko batch-eva paralelno (svaki u svom procesu)
+  - --done-log     → uspješne batch-eve zapiši u done.log umjesto premještanja u done/
 """
 
 from __future__ import annotations
 
 import argparse
 import logging
-import subprocess
+import os
+import shlex
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Optional
-
-try:
-    # koristimo iste helper funkcije kao i postojeći download.py
-    from config import get_downloader_batch_dir, get_default_music_root
-except ImportError as exc:  # pragma: no cover - defensive
-    print(
-        "[FATAL] download_queue.py: ne mogu importati config helper funkcije:",
-        exc,
-        file=sys.stderr,
-    )
-    sys.exit(1)
-
+from typing import List, Optional, Set, TextIO, Tuple
 
 log = logging.getLogger(__name__)
 
 
+def _config():
+    """
+    Lijeni import config.py (iste helper funkcije kao i download.py);
+    --help i parsiranje argumenata ga ne trebaju.
+    """
+    try:
+        import config
+    except ImportError as exc:  # pragma: no cover - defensive
+        print(
+            "[FATAL] download_queue.py: ne mogu importati config helper funkcije:",
+            exc,
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    return config
+
+
 # =====================================================
 #                    POMOĆNE FUNKCIJE
 # =====================================================
@@ -52,6 +64,8 @@ def setup_logging(verbose: bool = True) -> None:
     logging.basicConfig(
         level=level,
         format="%(asctime)s [%(levelname)s] %(message)s",
+        # in-process downloader preuzima root logger; nakon batcha vraćamo naš
+        force=True,
     )
 
 
@@ -67,7 +81,7 @@ def resolve_music_root(path_arg: Optional[str]) -> Path:
         root.mkdir(parents=True, exist_ok=True)
         return root
 
-    mr = get_default_music_root()
+    mr = _config().get_default_music_root()
     if mr is not None:
         mr = mr.expanduser()
         mr.mkdir(parents=True, exist_ok=True)
@@ -80,20 +94,27 @@ def resolve_music_root(path_arg: Optional[str]) -> Path:
 
 def get_batch_dir() -> Path:
     """Direktorij gdje se nalaze batch JSON-ovi (tasks-lista) za downloader."""
-    p = Path(get_downloader_batch_dir())
+    p = Path(_config().get_downloader_batch_dir())
     p.mkdir(parents=True, exist_ok=True)
     return p
 
 
-def run_download_batch(json_path: Path, base_path: Path, dry_run: bool) -> int:
+def run_download_batch(
+    json_path: Path,
+    base_path: Path,
+    dry_run: bool,
+    subprocess_mode: bool = False,
+) -> int:
     """Pozovi postojeći modules.download za jedan batch JSON.
 
-    Vraća exit code pod-procesa.
+    Downloader se poziva u istom procesu (modules.download.main), pa se
+    interpreter, importi, spotdl klijent i cacheovi dijele između batch-eva.
+    Uz subprocess_mode=True ili env ZMUSIC_QUEUE_SUBPROCESS=1 svaki batch
+    ide u zaseban proces (izolacija; obavezno za paralelne batch-eve).
+
+    Vraća exit code downloadera.
     """
-    cmd: List[str] = [
-        sys.executable,
-        "-m",
-        "modules.download",
+    download_args: List[str] = [
         "batch",
         "--json",
         str(json_path),
@@ -102,11 +123,34 @@ def run_download_batch(json_path: Path, base_path: Path, dry_run: bool) -> int:
         "--info",
     ]
     if dry_run:
-        cmd.append("--dry-run")
-
-    log.info("Pozivam: %s", " ".join(cmd))
-    proc = subprocess.run(cmd)
-    return proc.returncode
+        download_args.append("--dry-run")
+
+    if subprocess_mode or os.environ.get("ZMUSIC_QUEUE_SUBPROCESS") == "1":
+        import subprocess
+
+        cmd = [sys.executable, "-m", "modules.download", *download_args]
+        if log.isEnabledFor(logging.INFO):
+            log.info("Pozivam: %s", shlex.join(cmd))
+        proc = subprocess.run(cmd)
+        return proc.returncode
+
+    from modules import download
+
+    if log.isEnabledFor(logging.INFO):
+        log.info("Pozivam (in-process): modules.download %s", shlex.join(download_args))
+    try:
+        exit_code = download.main(download_args)
+    except SystemExit as exc:
+        # downloader na FATAL greškama radi sys.exit()
+        code = exc.code
+        exit_code = code if isinstance(code, int) else (0 if code is None else 1)
+    except Exception:  # noqa: BLE001
+        logging.getLogger(__name__).exception("Downloader pao za batch %s", json_path.name)
+        exit_code = 1
+    finally:
+        download.stop_logging()
+        setup_logging(verbose=True)
+    return exit_code
 
 
 # =====================================================
@@ -114,6 +158,64 @@ def run_download_batch(json_path: Path, base_path: Path, dry_run: bool) -> int:
 # =====================================================
 
 
+DONE_LOG_NAME = "done.log"
+
+
+def load_done_names(done_log_path: Path) -> Set[str]:
+    """Učitaj imena batch JSON-ova zapisanih u done.log (format: ime<TAB>timestamp)."""
+    try:
+        with done_log_path.open("r", encoding="utf-8") as f:
+            return {line.split("\t", 1)[0] for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+def finish_batch(
+    json_path: Path,
+    exit_code: int,
+    done_dir: Path,
+    args: argparse.Namespace,
+    done_log: Optional[TextIO] = None,
+) -> bool:
+    """
+    Nakon batcha: uspješan JSON premjesti u done/ (ili obriši uz --delete-done),
+    neuspješan ostavi u queue-u. Vraća True ako je batch uspio.
+
+    Ako je zadan done_log (--done-log), uspješan JSON ostaje na mjestu, a
+    njegovo ime se samo dopiše u manifest — jedan append umjesto rename-a.
+    """
+    if exit_code == 0:
+        if args.dry_run:
+            log.info(
+                "  [DRY-RUN] Batch %s bi bio označen kao gotov (premješten ili obrisan).",
+                json_path.name,
+            )
+        else:
+            if args.delete_done:
+                json_path.unlink(missing_ok=True)
+                log.info("  Batch %s uspješan, JSON obrisan (--delete-done).", json_path.name)
+            elif done_log is not None:
+                done_log.write(f"{json_path.name}\t{time.time()}\n")
+                done_log.flush()
+                log.info("  Batch %s uspješan, zapisan u %s.", json_path.name, DONE_LOG_NAME)
+            else:
+                target = done_dir / json_path.name
+                json_path.rename(target)
+                log.info(
+                    "  Batch %s uspješan, premješten u %s.",
+                    json_path.name,
+                    target,
+                )
+        return True
+
+    log.error(
+        "  Batch %s završio s greškom (exit=%d). JSON ostaje u queue-u.",
+        json_path.name,
+        exit_code,
+    )
+    return False
+
+
 def handle_batch(args: argparse.Namespace) -> None:
     """Odradi JEDAN batch JSON (kroz existing modules.download)."""
     json_path = Path(args.json).expanduser()
@@ -137,6 +239,8 @@ def handle_queue(args: argparse.Namespace) -> None:
     - Svi batch-evi koji završe s exit=0:
         * u normalnom modu se presele u poddirektorij `done/`
         * ako je zadano --delete-done, JSON se obriše
+        * uz --done-log JSON ostaje gdje je, a ime se dopiše u done.log;
+          sljedeći queue run takve batch-eve preskače
     - Batch-evi s greškom ostaju gdje jesu (za kasniji retry).
     """
     batch_dir = get_batch_dir()
@@ -145,56 +249,101 @@ def handle_queue(args: argparse.Namespace) -> None:
     done_dir = batch_dir / "done"
     done_dir.mkdir(parents=True, exist_ok=True)
 
-    # pending = svi *.json u root batch_dir (ne diramo ono što je već u done/)
-    json_files = sorted(p for p in batch_dir.glob("*.json"))
+    use_done_log = args.done_log and not args.delete_done
+    done_log_path = batch_dir / DONE_LOG_NAME
+    done_names = load_done_names(done_log_path) if use_done_log else set()
+
+    # pending = svi *.json u root batch_dir (ne diramo ono što je već u done/);
+    # scandir + provjera sufiksa umjesto glob/fnmatch po unosu
+    with os.scandir(batch_dir) as it:
+        entries = [
+            entry
+            for entry in it
+            if entry.name.endswith(".json")
+            and entry.name not in done_names
+            and entry.is_file()
+        ]
+    # sortiramo po imenu (string) i tek onda pravimo Path objekte
+    entries.sort(key=lambda entry: entry.name)
+    json_files = [Path(entry.path) for entry in entries]
 
     if not json_files:
         log.info("Nema pending batch JSON-ova u %s.", batch_dir)
         return
 
     log.info("Našao %d batch JSON fajlova u queue-u (%s).", len(json_files), batch_dir)
+    if done_names:
+        log.info("Preskačem %d batch-eva već zapisanih u %s.", len(done_names), DONE_LOG_NAME)
+
+    # done.log otvaramo jednom (append); u dry-run modu se ništa ne zapisuje
+    done_log = (
+        done_log_path.open("a", encoding="utf-8")
+        if use_done_log and not args.dry_run
+        else None
+    )
+    try:
+        ok_batches, err_batches = _run_queue(
+            json_files, base_path, done_dir, args, done_log
+        )
+    finally:
+        if done_log is not None:
+            done_log.close()
 
+    log.info(
+        "QUEUE sažetak: %d OK batch(eva), %d batch(eva) s greškama, ukupno %d.",
+        ok_batches,
+        err_batches,
+        len(json_files),
+    )
+
+
+def _run_queue(
+    json_files: List[Path],
+    base_path: Path,
+    done_dir: Path,
+    args: argparse.Namespace,
+    done_log: Optional[TextIO],
+) -> Tuple[int, int]:
+    """Odradi batch-eve (redom ili paralelno); vraća (ok, s greškom)."""
     total_batches = len(json_files)
     ok_batches = 0
     err_batches = 0
 
-    for idx, json_path in enumerate(json_files, start=1):
-        log.info("[%d/%d] Batch: %s", idx, total_batches, json_path.name)
-        exit_code = run_download_batch(json_path, base_path, dry_run=args.dry_run)
-
-        if exit_code == 0:
-            ok_batches += 1
-            if args.dry_run:
-                log.info(
-                    "  [DRY-RUN] Batch %s bi bio označen kao gotov (premješten ili obrisan).",
-                    json_path.name,
-                )
+    concurrency = max(1, min(args.concurrency, total_batches))
+    if concurrency == 1:
+        for idx, json_path in enumerate(json_files, start=1):
+            log.info("[%d/%d] Batch: %s", idx, total_batches, json_path.name)
+            exit_code = run_download_batch(json_path, base_path, dry_run=args.dry_run)
+            if finish_batch(json_path, exit_code, done_dir, args, done_log):
+                ok_batches += 1
             else:
-                if args.delete_done:
-                    json_path.unlink(missing_ok=True)
-                    log.info("  Batch %s uspješan, JSON obrisan (--delete-done).", json_path.name)
+                err_batches += 1
+    else:
+        # Downloader u procesu dijeli globalno stanje (logging, progress bar),
+        # pa paralelni batch-evi idu svaki u svoj subprocess; threadovi ovdje
+        # samo čekaju na procese.
+        log.info("Paralelno batch-eva (--concurrency): %d", concurrency)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(
+                    run_download_batch, json_path, base_path, args.dry_run, True
+                ): json_path
+                for json_path in json_files
+            }
+            for done_idx, future in enumerate(as_completed(futures), start=1):
+                json_path = futures[future]
+                try:
+                    exit_code = future.result()
+                except Exception as exc:  # noqa: BLE001
+                    log.exception("Batch %s: neočekivana greška: %s", json_path.name, exc)
+                    exit_code = 1
+                log.info("[%d/%d] Batch gotov: %s", done_idx, total_batches, json_path.name)
+                if finish_batch(json_path, exit_code, done_dir, args, done_log):
+                    ok_batches += 1
                 else:
-                    target = done_dir / json_path.name
-                    json_path.rename(target)
-                    log.info(
-                        "  Batch %s uspješan, premješten u %s.",
-                        json_path.name,
-                        target,
-                    )
-        else:
-            err_batches += 1
-            log.error(
-                "  Batch %s završio s greškom (exit=%d). JSON ostaje u queue-u.",
-                json_path.name,
-                exit_code,
-            )
+                    err_batches += 1
 
-    log.info(
-        "QUEUE sažetak: %d OK batch(eva), %d batch(eva) s greškama, ukupno %d.",
-        ok_batches,
-        err_batches,
-        total_batches,
-    )
+    return ok_batches, err_batches
 
 
 # =====================================================
@@ -261,6 +410,23 @@ def build_parser() -> argparse.ArgumentParser:
             "Inače se premještaju u poddirektorij 'done/'."
         ),
     )
+    p_queue.add_argument(
+        "--done-log",
+        action="store_true",
+        help=(
+            "Uspješne batch JSON-ove ne premještaj, nego im ime dopiši u "
+            "done.log u batch direktoriju; idući queue run ih preskače."
+        ),
+    )
+    p_queue.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help=(
+            "Koliko batch-eva obrađivati paralelno (svaki u svom procesu). "
+            "Default 1 = jedan po jedan, u istom procesu."
+        ),
+    )
     p_queue.set_defaults(func=handle_queue)
 
     return parser
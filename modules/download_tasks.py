@@ -1,26 +1,61 @@
 #!/usr/bin/env python3
-import argparse, json, os, datetime
+import argparse, os, datetime, uuid, itertools, mmap
+from pathlib import Path
 from config import DOWNLOAD_BATCH_PATH
+from utils.json_io import loads, orjson, write_json
+
+try:
+    import ijson  # opcionalno: streaming čitanje velikih batch-eva
+except ImportError:
+    ijson = None
+
+# bez orjson-a, batch od ove veličine info čita streamom (ijson) umjesto
+# stdlib json-a cijelog fajla; s orjson-om je load_batch uvijek najbrži
+INFO_STREAM_MIN_BYTES = 1024*1024
+# ijson eventi s prefiksom "tasks.item" koji NE počinju novi element liste
+# (ključevi i kraj taska imaju isti prefiks kao i njegov početak)
+_NOT_ITEM_START = frozenset({"map_key","end_map","end_array"})
+
+def utc_now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def iso_z(ts):
+    # "2025-01-01T12:00:00Z" (UTC, bez mikrosekundi)
+    return ts.isoformat(timespec="seconds").replace("+00:00","Z")
+
+def empty_batch():
+    return {"version":1,"generated_by":"download_tasks.py",
+            "generated_at":iso_z(utc_now()),
+            "tasks":[]}
 
 def load_batch(path):
     if not os.path.exists(path):
-        return {"version":1,"generated_by":"download_tasks.py",
-                "generated_at":datetime.datetime.utcnow().isoformat()+"Z",
-                "tasks":[]}
-    with open(path,"r") as f:
-        return json.load(f)
+        return empty_batch()
+    # orjson (C) ako je dostupan, inače stdlib json
+    with open(path,"rb") as f:
+        return loads(f.read())
+
+def iter_tasks(path):
+    # taskovi jedan po jedan; s ijson-om bez učitavanja cijelog JSON-a
+    if not os.path.exists(path):
+        return
+    if ijson is None:
+        yield from load_batch(path).get("tasks",[])
+        return
+    with open(path,"rb") as f:
+        yield from ijson.items(f,"tasks.item",use_float=True)
 
 def save_batch(path, data):
     data["generated_by"]="download_tasks.py"
-    data["generated_at"]=datetime.datetime.utcnow().isoformat()+"Z"
-    with open(path,"w") as f:
-        json.dump(data,f,indent=2)
+    data["generated_at"]=iso_z(utc_now())
+    write_json(Path(path), data, pretty=True)
 
 def add_track(args):
     path = args.batch or DOWNLOAD_BATCH_PATH
     data = load_batch(path)
+    # sufiks iz uuid-a: ID-evi ostaju jedinstveni i kad se više trackova doda u istoj sekundi
     task = {
-        "task_id": datetime.datetime.utcnow().strftime("%Y%m%d-%H%M%S"),
+        "task_id": utc_now().strftime("%Y%m%d-%H%M%S")+"-"+uuid.uuid4().hex[:6],
         "source": args.source,
         "type": "track",
         "spotify_id": args.spotify_id,
@@ -37,16 +72,27 @@ def add_track(args):
 
 def info(args):
     path = args.batch or DOWNLOAD_BATCH_PATH
-    data = load_batch(path)
-    print("Tasks:", len(data.get("tasks",[])))
-    for t in data.get("tasks",[])[:5]:
+    if (orjson is not None or ijson is None or not os.path.exists(path)
+            or os.path.getsize(path) < INFO_STREAM_MIN_BYTES):
+        tasks = load_batch(path).get("tasks",[])
+        first = tasks[:5]
+        total = len(tasks)
+    else:
+        # veliki batch bez orjson-a: pregled = samo prefiks fajla, broj =
+        # početni eventi elemenata "tasks" liste (ostali ključevi, npr.
+        # "tracks", se ne broje), bez gradnje dictova za ostale taskove
+        with open(path,"rb") as f, mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ) as mm:
+            first = list(itertools.islice(ijson.items(mm,"tasks.item",use_float=True),5))
+            mm.seek(0)  # items() je pomaknuo poziciju čitanja mmap-a
+            total = sum(1 for prefix, event, _ in ijson.parse(mm)
+                        if prefix == "tasks.item" and event not in _NOT_ITEM_START)
+    print("Tasks:", total)
+    for t in first:
         print("-", t.get("spotify_id"), t.get("title"))
 
 def clear(args):
     path = args.batch or DOWNLOAD_BATCH_PATH
-    save_batch(path, {"version":1,"generated_by":"download_tasks.py",
-                      "generated_at":datetime.datetime.utcnow().isoformat()+"Z",
-                      "tasks":[]})
+    save_batch(path, empty_batch())
     print("Cleared batch.")
 
 def main():
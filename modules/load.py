@@ -11,13 +11,25 @@ i za koje znamo ili možemo pogoditi iz strukture final JSON-a.
 from __future__ import annotations
 
 import argparse
+import collections
+import functools
 import json
+import os
 import sqlite3
-from datetime import datetime
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
 
 from config import get_main_db_path
+from utils.json_io import read_json
+
+try:
+    import ijson  # opcionalno: streaming parse velikih final JSON-ova
+except ImportError:
+    ijson = None
 
 
 # ---------------------------------------------------------------------
@@ -32,11 +44,38 @@ def get_db_path(custom: Optional[str]) -> Path:
     return get_main_db_path()
 
 
+# broj pripremljenih naredbi koje sqlite3 drži po konekciji (default 128)
+SQLITE_CACHED_STATEMENTS = 256
+# page cache po konekciji; negativno = KiB (64 MiB)
+SQLITE_CACHE_SIZE_KIB = 65536
+# koliko baze SQLite smije čitati kroz mmap umjesto read() syscallova (256 MiB)
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+
+
+def _connect(db_path: Path, bulk: bool = False) -> sqlite3.Connection:
+    """Otvori bazu s postavkama za upis.
+
+    WAL + synchronous=NORMAL: nema fsync-a rollback journala po transakciji.
+    bulk=True dodatno drži ekskluzivni lock do zatvaranja konekcije (drugi
+    procesi za to vrijeme ne mogu čitati bazu).
+    """
+    conn = sqlite3.connect(db_path, cached_statements=SQLITE_CACHED_STATEMENTS)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KIB}")
+    if bulk:
+        conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+    return conn
+
+
 # ---------------------------------------------------------------------
 # Pronalaženje final JSON-a
 # ---------------------------------------------------------------------
 
 def _guess_final_json_path(base_path: Path) -> Path:
+    """base_path mora biti resolve()-an; vraćeni put je također apsolutan."""
     p = base_path
 
     # ako je direktno JSON → koristi taj
@@ -54,7 +93,8 @@ def _guess_final_json_path(base_path: Path) -> Path:
 
     for c in candidates:
         if c.is_file():
-            return c
+            # kandidat može biti symlink; resolve samo ovdje, JSON put je već resolve()-an
+            return c.resolve()
 
     raise SystemExit(
         f"[ERROR] Ne mogu pronaći FINAL JSON za: {p}\n"
@@ -62,91 +102,364 @@ def _guess_final_json_path(base_path: Path) -> Path:
     )
 
 
-def _load_final_json(final_path: Path) -> Dict[str, Any]:
+# final JSON veći od ovoga parsira se streamom (ijson) i zadržavaju se samo
+# polja koja _build_record čita (višestruko manja potrošnja memorije); manje
+# fajlove orjson dekodira cijele brže nego što ih ijson prođe
+STREAM_MIN_BYTES = 8 * 1024 * 1024
+
+# putanje (prefiksi u ijson notaciji) koje _build_record čita neovisno o shemi
+_FINAL_JSON_PATHS = (
+    "file_hash", "hash_sha256", "hash",
+    "file.hash_sha256", "file.file_hash", "file.hash",
+    "file.path", "file.size_bytes", "file.mtime",
+    "local_tags.title", "local_tags.artist", "local_tags.album",
+    "local_tags.album_artist", "local_tags.track_no", "local_tags.year",
+    "local_tags.duration_sec", "local_tags.genre",
+    "spotify.id", "spotify.name", "spotify.artists", "spotify.url",
+    "spotify.preview_url", "spotify.popularity", "spotify.isrc",
+    "spotify.track_number", "spotify.disc_number", "spotify.duration_ms",
+    "spotify.album.id", "spotify.album.name", "spotify.album.release_date",
+    "match.score_percent", "match.score_raw",
+    "genre.primary",
+    "mood.valence", "mood.arousal", "mood.label",
+    "instruments.lead", "instruments.bass", "instruments.drums",
+)
+# features ključevi koje _build_record koristi kao aliase (uz istoimene stupce)
+_FEATURE_ALIASES = (
+    "duration", "tempo", "key", "loudness_db", "danceability", "energy",
+    "valence", "acousticness", "instrumentalness", "tempo_confidence",
+)
+
+
+def _final_json_keep_paths(cols) -> frozenset:
+    """Skup JSON putanja potrebnih za zadane stupce tablice tracks."""
+    features = {f"features.{c}" for c in cols} | {f"features.{k}" for k in _FEATURE_ALIASES}
+    return frozenset(_FINAL_JSON_PATHS) | features
+
+
+def _stream_pick(f, keep: frozenset) -> Dict[str, Any]:
+    """Jedan prolaz kroz ijson evente; materijaliziraju se samo putanje iz keep."""
+    out: Dict[str, Any] = {}
+    builder = None
+    depth = 0
+    path = ""
+
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+                if depth == 0:
+                    _set_path(out, path, builder.value)
+                    builder = None
+            continue
+
+        if event == "map_key" or prefix not in keep:
+            continue
+        if event in ("start_map", "start_array"):
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            depth = 1
+            path = prefix
+        elif event not in ("end_map", "end_array"):
+            _set_path(out, prefix, value)
+
+    return out
+
+
+def _set_path(out: Dict[str, Any], path: str, value: Any) -> None:
+    *parents, last = path.split(".")
+    node = out
+    for part in parents:
+        node = node.setdefault(part, {})
+    node[last] = value
+
+
+def _load_final_json(final_path: Path, keep: Optional[frozenset] = None) -> Dict[str, Any]:
+    """Učitaj final JSON.
+
+    Uz keep (vidi _final_json_keep_paths) i ijson, veliki fajlovi se čitaju
+    streamom i vraća se samo podskup polja koji _build_record koristi.
+    """
     try:
-        with final_path.open("r", encoding="utf-8") as f:
-            return json.load(f)
+        if keep is not None and ijson is not None and final_path.stat().st_size >= STREAM_MIN_BYTES:
+            try:
+                with final_path.open("rb") as f:
+                    return _stream_pick(f, keep)
+            except ijson.JSONError:
+                # yajl ne prima NaN/Infinity (stdlib json ih piše); puni
+                # parse ispod ih prihvaća, a neispravan JSON javlja kao i prije
+                pass
+        # orjson (C) ako je dostupan (veliki fajlovi preko mmap-a), inače
+        # stdlib json; oba dižu JSONDecodeError
+        return read_json(final_path)
     except json.JSONDecodeError as e:
         raise SystemExit(f"[ERROR] Neispravan JSON u {final_path}: {e}") from e
+    except Exception as e:
+        if ijson is not None and isinstance(e, ijson.JSONError):
+            raise SystemExit(f"[ERROR] Neispravan JSON u {final_path}: {e}") from e
+        raise
 
 
 # ---------------------------------------------------------------------
 # Shema baze
 # ---------------------------------------------------------------------
 
-def _get_tracks_columns(conn: sqlite3.Connection):
+@dataclass(frozen=True)
+class TrackSchema:
+    """Stupci tablice tracks i ono što iz njih slijedi; gradi se jednom po konekciji."""
+
+    cols: frozenset
+    # ključ za upsert: file_hash ako postoji, inače file_path (None = nijedan)
+    key_col: Optional[str]
+    # JSON putanje koje _build_record čita (za streaming parse)
+    keep_paths: frozenset
+
+
+def _get_tracks_schema(conn: sqlite3.Connection) -> TrackSchema:
     cur = conn.execute("PRAGMA table_info(tracks)")
-    cols = [r[1] for r in cur.fetchall()]
+    # PRAGMA vraća nove str objekte; intern ih izjednači s literalima iz
+    # mapping tablica (CPython ih interna sam), pa lookup u colset/row
+    # prolazi na usporedbi identiteta
+    cols = [sys.intern(r[1]) for r in cur.fetchall()]
     if not cols:
         raise SystemExit("[ERROR] Tablica 'tracks' ne postoji u bazi.")
-    # preferiraj file_hash > file_path > id za upsert
-    key_col = None
-    for k in ("file_hash", "file_path", "id"):
-        if k in cols:
-            key_col = k
-            break
-    return cols, key_col
+    # preferiraj file_hash > file_path za upsert
+    key_col = next((k for k in ("file_hash", "file_path") if k in cols), None)
+    return TrackSchema(
+        cols=frozenset(cols),
+        key_col=key_col,
+        keep_paths=_final_json_keep_paths(cols),
+    )
 
 
 # ---------------------------------------------------------------------
 # Infer hash i path iz final JSON-a
 # ---------------------------------------------------------------------
 
-def _infer_file_hash(obj: Dict[str, Any]) -> Optional[str]:
-    # 1) direktno na rootu
-    for k in ("file_hash", "hash_sha256", "hash"):
-        v = obj.get(k)
-        if isinstance(v, str) and v:
-            return v
+# redoslijed kandidata: na rootu prvo file_hash, u file sekciji prvo hash_sha256
+_ROOT_HASH_KEYS = ("file_hash", "hash_sha256", "hash")
+_FILE_HASH_KEYS = ("hash_sha256", "file_hash", "hash")
 
-    # 2) file.hash_sha256
+
+def _infer_file_hash(obj: Dict[str, Any]) -> Optional[str]:
+    # 1) direktno na rootu, 2) file.hash_sha256 (i aliasi)
     file_info = obj.get("file")
+    sources = [(obj, _ROOT_HASH_KEYS)]
     if isinstance(file_info, dict):
-        for k in ("hash_sha256", "file_hash", "hash"):
-            v = file_info.get(k)
-            if isinstance(v, str) and v:
-                return v
-
-    return None
+        sources.append((file_info, _FILE_HASH_KEYS))
+    return next(
+        (v for d, keys in sources for k in keys if isinstance(v := d.get(k), str) and v),
+        None,
+    )
 
 
 def _infer_file_path(obj: Dict[str, Any], cli_path: Path) -> Optional[str]:
-    # ako CLI nije JSON → to je audio path
+    # ako CLI nije JSON → to je audio path (caller ga već resolve()-a)
     if cli_path.suffix.lower() != ".json":
-        return str(cli_path.resolve())
+        return str(cli_path)
 
     # inače probaj iz file.path
     file_info = obj.get("file")
-    if isinstance(file_info, dict):
-        v = file_info.get("path")
-        if isinstance(v, str) and v:
-            return v
-
-    return None
+    v = file_info.get("path") if isinstance(file_info, dict) else None
+    return v if isinstance(v, str) and v else None
 
 
 # ---------------------------------------------------------------------
 # Flat map JSON -> stupci tracks
 # ---------------------------------------------------------------------
 
+class _Src(NamedTuple):
+    """Sekcije final JSON-a koje čitaju funkcije iz mapping tablica."""
+
+    file: Dict[str, Any]
+    tags: Dict[str, Any]
+    spotify: Dict[str, Any]
+    album: Optional[Dict[str, Any]]  # spotify.album, samo ako je dict
+    match: Dict[str, Any]
+    features: Dict[str, Any]
+    genre: Any
+    mood: Any
+    instr: Any
+
+
+# vraća se iz mapping funkcije kad stupac treba izostaviti (ne upisati ni NULL)
+_SKIP = object()
+
+# zajednički prazni dict za sekcije kojih nema u final JSON-u (umjesto novog
+# `{}` po sekciji i zapisu); samo se čita, NIKAD ga ne mijenjati
+_NO_SECTION: Dict[str, Any] = {}
+
+
+def _artist(x: _Src) -> Any:
+    artist = x.tags.get("artist")
+    if not artist and isinstance(x.spotify.get("artists"), list) and x.spotify["artists"]:
+        artist = x.spotify["artists"][0]
+    return artist
+
+
+def _album(x: _Src) -> Any:
+    album = x.tags.get("album")
+    if not album and x.album is not None:
+        album = x.album.get("name")
+    return album
+
+
+@functools.lru_cache(maxsize=1024)
+def _release_year(rd: str) -> Optional[int]:
+    # "YYYY", "YYYY-MM" ili "YYYY-MM-DD" (Spotify release_date_precision);
+    # fromisoformat ne prima godinu/mjesec bez dana pa ostaje slice + isdigit.
+    # Trackovi istog albuma dijele datum, pa je lru_cache pogodak gotovo uvijek.
+    if len(rd) >= 4 and rd[:4].isdigit():
+        return int(rd[:4])
+    return None
+
+
+def _year(x: _Src) -> Any:
+    year = x.tags.get("year")
+    if not year and x.album is not None:
+        rd = x.album.get("release_date")
+        if isinstance(rd, str):
+            ry = _release_year(rd)
+            if ry is not None:
+                year = ry
+    return year
+
+
+def _duration(x: _Src) -> Any:
+    dur = x.tags.get("duration_sec")
+    if dur is None:
+        dur = x.features.get("duration")
+    if dur is None and x.spotify.get("duration_ms"):
+        dur = x.spotify["duration_ms"] / 1000.0
+    return dur
+
+
+def _genre(x: _Src) -> Any:
+    g = x.tags.get("genre")
+    if not g and isinstance(x.genre, dict):
+        g = x.genre.get("primary")
+    return g
+
+
+def _artist_ids(x: _Src) -> Any:
+    # nemamo ID-jeve, samo imena → comma-separated lista imena
+    arts = x.spotify.get("artists")
+    return ",".join(arts) if isinstance(arts, list) else _SKIP
+
+
+def _match_score(x: _Src) -> Any:
+    # koristi percent ili raw ako postoji
+    score = x.match.get("score_percent")
+    if score is None:
+        score = x.match.get("score_raw")
+    return score
+
+
+def _section_get(section: str, key: str) -> Callable[[_Src], Any]:
+    """Getter za sekciju koja možda nije dict (tada se stupac izostavlja)."""
+
+    def get(x: _Src) -> Any:
+        d = getattr(x, section)
+        return d.get(key) if isinstance(d, dict) else _SKIP
+
+    return get
+
+
+# stupac -> vrijednost iz final JSON-a; redoslijed je redoslijed upisa
+_BASE_FIELDS: Tuple[Tuple[str, Callable[[_Src], Any]], ...] = (
+    # --- identitet filea ---
+    ("file_size", lambda x: x.file.get("size_bytes")),
+    ("mtime", lambda x: x.file.get("mtime")),
+    # --- osnovni tagovi ---
+    ("title", lambda x: x.tags.get("title") or x.spotify.get("name")),
+    ("artist", _artist),
+    ("album", _album),
+    ("track_number", lambda x: x.tags.get("track_no") or x.spotify.get("track_number")),
+    ("disc_number", lambda x: x.spotify.get("disc_number")),
+    ("year", _year),
+    ("duration_sec", _duration),
+    ("genre", _genre),
+    # --- Spotify meta ---
+    ("spotify_id", lambda x: x.spotify.get("id")),
+    ("spotify_url", lambda x: x.spotify.get("url")),
+    ("spotify_preview_url", lambda x: x.spotify.get("preview_url")),
+    ("spotify_popularity", lambda x: x.spotify.get("popularity")),
+    ("spotify_isrc", lambda x: x.spotify.get("isrc")),
+    ("spotify_album_id", lambda x: x.album.get("id") if x.album is not None else _SKIP),
+    ("spotify_artist_ids", _artist_ids),
+    ("spotify_match_score", _match_score),
+)
+
+# stupac -> ključ u features; samo ako stupac nije već popunjen istoimenim ključem
+_FEATURE_ALIASES_MAP: Tuple[Tuple[str, str], ...] = (
+    ("bpm", "tempo"),
+    ("key", "key"),
+    ("loudness_db", "loudness_db"),
+    ("danceability", "danceability"),
+    ("energy", "energy"),
+    ("valence", "valence"),
+    ("acousticness", "acousticness"),
+    ("instrumentalness", "instrumentalness"),
+    ("tempo_confidence", "tempo_confidence"),
+)
+
+# mood / instruments ako imamo posebne stupce (prepisuju features)
+_MOOD_INSTR_FIELDS: Tuple[Tuple[str, Callable[[_Src], Any]], ...] = (
+    ("mood_valence", _section_get("mood", "valence")),
+    ("mood_arousal", _section_get("mood", "arousal")),
+    ("mood_label", _section_get("mood", "label")),
+    ("lead_instrument", _section_get("instr", "lead")),
+    ("bass_type", _section_get("instr", "bass")),
+    ("drums_pattern", _section_get("instr", "drums")),
+)
+
+# verzije / flagovi: default vrijednosti ako stupac nije već popunjen
+_DEFAULT_FIELDS: Tuple[Tuple[str, Any], ...] = (
+    ("analysis_version", 1),
+    ("spotify_meta_version", 1),
+    ("is_missing", 0),
+    ("is_duplicate", 0),
+)
+
+
 def _build_record(
     obj: Dict[str, Any],
-    cols,
+    schema: TrackSchema,
     cli_path: Path,
     final_json_path: Path,
+    dir_names: Optional[Set[str]] = None,
+    dry: bool = False,
 ) -> Tuple[Dict[str, Any], str, Any]:
-    colset = set(cols)
+    """Flatten final JSON-a u red za tablicu tracks.
+
+    cli_path i final_json_path moraju biti resolve()-ani. dir_names je
+    (opcionalno) skup imena fajlova u direktoriju final JSON-a — tada se
+    audio/meta_s putanje provjeravaju u njemu umjesto exists() po fajlu.
+    dry=True preskače pogađanje audio/meta_s putanja (ništa se ne upisuje,
+    pa nema smisla stat-ati fajlove).
+    """
+    colset = schema.cols
+    if schema.key_col is None:
+        raise SystemExit("[ERROR] ne mogu odrediti ključ za upsert (ni file_hash ni file_path nisu dostupni).")
     row: Dict[str, Any] = {}
 
     # razbij JSON na sekcije
-    file_info   = obj.get("file")        or {}
-    tags_local  = obj.get("local_tags")  or {}
-    spotify     = obj.get("spotify")     or {}
-    match_info  = obj.get("match")       or {}
-    features    = obj.get("features")    or {}
-    genre_info  = obj.get("genre")       or {}
-    mood_info   = obj.get("mood")        or {}
-    instr_info  = obj.get("instruments") or {}
+    spotify = obj.get("spotify") or _NO_SECTION
+    sp_album = spotify.get("album")
+    x = _Src(
+        file=obj.get("file") or _NO_SECTION,
+        tags=obj.get("local_tags") or _NO_SECTION,
+        spotify=spotify,
+        album=sp_album if isinstance(sp_album, dict) else None,
+        match=obj.get("match") or _NO_SECTION,
+        features=obj.get("features") or _NO_SECTION,
+        genre=obj.get("genre") or _NO_SECTION,
+        mood=obj.get("mood") or _NO_SECTION,
+        instr=obj.get("instruments") or _NO_SECTION,
+    )
 
     # --- file_hash / file_path ---
     file_hash = _infer_file_hash(obj)
@@ -162,196 +475,324 @@ def _build_record(
             raise SystemExit("[ERROR] ne mogu odrediti file_path ni iz CLI puta ni iz JSON-a.")
         row["file_path"] = file_path
 
-    # --- identitet filea ---
-    if "file_size" in colset:
-        row["file_size"] = file_info.get("size_bytes")
-    if "mtime" in colset:
-        row["mtime"] = file_info.get("mtime")
-
-    # --- osnovni tagovi ---
-    if "title" in colset:
-        row["title"] = tags_local.get("title") or spotify.get("name")
-    if "artist" in colset:
-        artist = tags_local.get("artist")
-        if not artist and isinstance(spotify.get("artists"), list) and spotify["artists"]:
-            artist = spotify["artists"][0]
-        row["artist"] = artist
-    if "album" in colset:
-        album = tags_local.get("album")
-        if not album and isinstance(spotify.get("album"), dict):
-            album = spotify["album"].get("name")
-        row["album"] = album
+    # --- tagovi + Spotify meta (samo stupci koji postoje u bazi) ---
+    for col, fn in _BASE_FIELDS:
+        if col in colset:
+            v = fn(x)
+            if v is not _SKIP:
+                row[col] = v
     if "album_artist" in colset:
         # ako nemamo posebnog album_artist, koristi artist
-        row["album_artist"] = tags_local.get("album_artist") or row.get("artist")
-    if "track_number" in colset:
-        row["track_number"] = tags_local.get("track_no") or spotify.get("track_number")
-    if "disc_number" in colset:
-        row["disc_number"] = spotify.get("disc_number")
-    if "year" in colset:
-        year = tags_local.get("year")
-        if not year and isinstance(spotify.get("album"), dict):
-            rd = spotify["album"].get("release_date")
-            if isinstance(rd, str) and len(rd) >= 4 and rd[:4].isdigit():
-                year = int(rd[:4])
-        row["year"] = year
-    if "duration_sec" in colset:
-        dur = tags_local.get("duration_sec")
-        if dur is None:
-            dur = features.get("duration")
-        if dur is None and spotify.get("duration_ms"):
-            dur = spotify["duration_ms"] / 1000.0
-        row["duration_sec"] = dur
-    if "genre" in colset:
-        g = tags_local.get("genre")
-        if not g and isinstance(genre_info, dict):
-            g = genre_info.get("primary")
-        row["genre"] = g
-
-    # --- Spotify meta ---
-    if "spotify_id" in colset:
-        row["spotify_id"] = spotify.get("id")
-    if "spotify_url" in colset:
-        row["spotify_url"] = spotify.get("url")
-    if "spotify_preview_url" in colset:
-        row["spotify_preview_url"] = spotify.get("preview_url")
-    if "spotify_popularity" in colset:
-        row["spotify_popularity"] = spotify.get("popularity")
-    if "spotify_isrc" in colset:
-        row["spotify_isrc"] = spotify.get("isrc")
-    if "spotify_album_id" in colset and isinstance(spotify.get("album"), dict):
-        row["spotify_album_id"] = spotify["album"].get("id")
-    if "spotify_artist_ids" in colset:
-        # nemamo ID-jeve, samo imena → ostavi None ili koristi comma-separated liste imena
-        arts = spotify.get("artists")
-        if isinstance(arts, list):
-            row["spotify_artist_ids"] = ",".join(arts)
-    if "spotify_match_score" in colset:
-        # koristi percent ili raw ako postoji
-        score = match_info.get("score_percent")
-        if score is None:
-            score = match_info.get("score_raw")
-        row["spotify_match_score"] = score
+        row["album_artist"] = x.tags.get("album_artist") or row.get("artist")
 
     # --- Sažetak audio analize / features ---
     # direct mapping ako postoje istoimeni stupci
-    for k, v in features.items():
-        if k in colset and k not in row:
-            row[k] = v
+    # (presjek dict view-a i seta radi se u C-u, bez provjere po ključu)
+    features = x.features
+    row.update({k: features[k] for k in features.keys() & colset - row.keys()})
 
     # posebni aliasi: tempo -> bpm, key -> key, energy -> energy, itd.
-    if "bpm" in colset and "bpm" not in row:
-        row["bpm"] = features.get("tempo")
-    if "key" in colset and "key" not in row:
-        row["key"] = features.get("key")
-    if "loudness_db" in colset and "loudness_db" not in row:
-        row["loudness_db"] = features.get("loudness_db")
-    if "danceability" in colset and "danceability" not in row:
-        row["danceability"] = features.get("danceability")
-    if "energy" in colset and "energy" not in row:
-        row["energy"] = features.get("energy")
-    if "valence" in colset and "valence" not in row:
-        row["valence"] = features.get("valence")
-    if "acousticness" in colset and "acousticness" not in row:
-        row["acousticness"] = features.get("acousticness")
-    if "instrumentalness" in colset and "instrumentalness" not in row:
-        row["instrumentalness"] = features.get("instrumentalness")
-    if "tempo_confidence" in colset and "tempo_confidence" not in row:
-        row["tempo_confidence"] = features.get("tempo_confidence")
-
-    # --- mood / instruments ako imamo posebne stupce ---
-    if isinstance(mood_info, dict):
-        if "mood_valence" in colset:
-            row["mood_valence"] = mood_info.get("valence")
-        if "mood_arousal" in colset:
-            row["mood_arousal"] = mood_info.get("arousal")
-        if "mood_label" in colset:
-            row["mood_label"] = mood_info.get("label")
-    if isinstance(instr_info, dict):
-        if "lead_instrument" in colset:
-            row["lead_instrument"] = instr_info.get("lead")
-        if "bass_type" in colset:
-            row["bass_type"] = instr_info.get("bass")
-        if "drums_pattern" in colset:
-            row["drums_pattern"] = instr_info.get("drums")
+    for col, fkey in _FEATURE_ALIASES_MAP:
+        if col in colset and col not in row:
+            row[col] = features.get(fkey)
+
+    for col, fn in _MOOD_INSTR_FIELDS:
+        if col in colset:
+            v = fn(x)
+            if v is not _SKIP:
+                row[col] = v
 
     # --- putevi do JSON datoteka ---
     if "final_path" in colset:
-        row["final_path"] = str(final_json_path.resolve())
+        row["final_path"] = str(final_json_path)
 
     # pokušaj pogoditi audio/meta_s putanje prema imenu final JSON-a
+    if dry:
+        colset = colset - {"audio_path", "meta_s_path"}
     stem_final = final_json_path.name.replace(".final.json", "")
     parent = final_json_path.parent
-    guess_audio = parent / f"{stem_final}.analysis.json"
-    guess_meta = parent / f"{stem_final}.spotify.json"
-    if "audio_path" in colset and guess_audio.exists():
-        row["audio_path"] = str(guess_audio)
-    if "meta_s_path" in colset and guess_meta.exists():
-        row["meta_s_path"] = str(guess_meta)
+    for col, suffix in (("audio_path", ".analysis.json"), ("meta_s_path", ".spotify.json")):
+        if col not in colset:
+            continue
+        name = stem_final + suffix
+        guess = parent / name
+        if (name in dir_names) if dir_names is not None else guess.exists():
+            row[col] = str(guess)
 
     # --- verzije / flagovi ---
-    if "analysis_version" in colset and "analysis_version" not in row:
-        row["analysis_version"] = 1
-    if "spotify_meta_version" in colset and "spotify_meta_version" not in row:
-        row["spotify_meta_version"] = 1
-    if "is_missing" in colset and "is_missing" not in row:
-        row["is_missing"] = 0
-    if "is_duplicate" in colset and "is_duplicate" not in row:
-        row["is_duplicate"] = 0
-
-    # odredi ključ za upsert
-    if "file_hash" in colset and file_hash:
-        key_col = "file_hash"
-        key_val = file_hash
-    elif "file_path" in colset and file_path:
-        key_col = "file_path"
-        key_val = file_path
-    else:
-        raise SystemExit("[ERROR] ne mogu odrediti ključ za upsert (ni file_hash ni file_path nisu dostupni).")
+    for col, default in _DEFAULT_FIELDS:
+        if col in colset and col not in row:
+            row[col] = default
 
-    return row, key_col, key_val
+    # ključ za upsert je određen shemom; vrijednost je gore već provjerena
+    return row, schema.key_col, row[schema.key_col]
 
 
 # ---------------------------------------------------------------------
 # UPSERT
 # ---------------------------------------------------------------------
 
+_TIMESTAMP_COLS = ("added_at", "updated_at")
+
+
+@functools.lru_cache(maxsize=64)
+def _make_upsert_sql(cols: Tuple[str, ...], key: str, returning: bool = False) -> str:
+    """INSERT ... ON CONFLICT(key) DO UPDATE za zadani (točan) skup stupaca.
+
+    cols su stupci zapisa BEZ added_at/updated_at; ta dva se uvijek dodaju
+    na kraj (parametri: vrijednosti cols, pa added_at, pa updated_at).
+    added_at se postavlja samo kod inserta. Update se radi samo ako se neki
+    stupac zapisa (osim ključa) stvarno razlikuje od reda u bazi — tada se
+    prepisuju ti stupci i updated_at; nepromijenjen red se ne dira (nema
+    prljavih stranica ni WAL zapisa, updated_at ostaje). returning=True
+    dodaje RETURNING rowid za razlikovanje insert/update (SQLite >= 3.35;
+    ne koristi se s executemany).
+    """
+    insert_cols = cols + _TIMESTAMP_COLS
+    data_cols = [c for c in cols if c != key]
+    sql = (
+        f"INSERT INTO tracks ({', '.join(insert_cols)}) "
+        f"VALUES ({', '.join('?' * len(insert_cols))}) "
+        f"ON CONFLICT({key}) DO "
+    )
+    if not data_cols:
+        sql += "NOTHING"
+    else:
+        sql += (
+            "UPDATE SET "
+            + ", ".join(f"{c}=excluded.{c}" for c in data_cols + ["updated_at"])
+            + f" WHERE ({', '.join(f'tracks.{c}' for c in data_cols)})"
+            + f" IS NOT ({', '.join(f'excluded.{c}' for c in data_cols)})"
+        )
+    return sql + " RETURNING rowid" if returning else sql
+
+
+def _upsert_params(data: Dict[str, Any], now: str) -> Tuple[Tuple[str, ...], Tuple[Any, ...]]:
+    """(stupci bez timestampova, parametri za _make_upsert_sql) — bez kopije data."""
+    # sortirano: isti skup stupaca = isti SQL string (lru_cache) / ista batch grupa
+    cols = tuple(sorted(c for c in data if c not in _TIMESTAMP_COLS))
+    return cols, tuple(data[c] for c in cols) + (data.get("added_at", now), now)
+
+
+def _ensure_unique_key(conn: sqlite3.Connection, key: str) -> None:
+    """ON CONFLICT(key) traži UNIQUE indeks na ključu; kreiraj ga ako ga nema.
+
+    Baze iz db_creator-a već imaju UNIQUE na file_hash/file_path, pa se
+    ovdje u pravilu ništa ne zapisuje.
+    """
+    if key == "id":
+        return
+    for _seq, name, unique, *_rest in conn.execute("PRAGMA index_list(tracks)").fetchall():
+        if not unique:
+            continue
+        idx_cols = [r[2] for r in conn.execute(f"PRAGMA index_info({name})").fetchall()]
+        if idx_cols == [key]:
+            return
+    try:
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_tracks_{key}_unique ON tracks({key})")
+    except sqlite3.IntegrityError as e:
+        raise SystemExit(
+            f"[ERROR] Ne mogu kreirati UNIQUE indeks na tracks.{key} (duplikati u bazi?): {e}"
+        ) from e
+
+
+def _utc_now_str() -> str:
+    """UTC vrijeme kao "YYYY-MM-DD HH:MM:SS" (isti format kao prije isoformat)."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+
+
 def _upsert_track(
     conn: sqlite3.Connection,
     data: Dict[str, Any],
     key: str,
     val: Any,
     dry: bool,
+    now: Optional[str] = None,
 ) -> str:
-    cur = conn.execute(f"SELECT id FROM tracks WHERE {key} = ?", (val,))
-    row = cur.fetchone()
-    now = datetime.utcnow().isoformat(sep=" ", timespec="seconds")
+    if dry:
+        cur = conn.execute(f"SELECT 1 FROM tracks WHERE {key} = ?", (val,))
+        return "dry-run insert" if cur.fetchone() is None else "dry-run update"
 
-    d = dict(data)
+    if now is None:
+        now = _utc_now_str()
 
+    cols, params = _upsert_params(data, now)
+
+    # jedan UPSERT umjesto SELECT + INSERT/UPDATE; kod update-a SQLite ne
+    # mijenja last_insert_rowid, pa se vraćeni rowid razlikuje od lastrowid
+    cur = conn.execute(_make_upsert_sql(cols, key, returning=True), params)
+    row = cur.fetchone()
+    cur.fetchall()
     if row is None:
-        d.setdefault("added_at", now)
-        d["updated_at"] = now
-        cols = list(d.keys())
-        vals = [d[c] for c in cols]
-        if not dry:
-            conn.execute(
-                f"INSERT INTO tracks ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
-                vals,
-            )
-        return "dry-run insert" if dry else "inserted"
-    else:
-        d["updated_at"] = now
-        d.pop("added_at", None)
-        d.pop(key, None)
-        if d and not dry:
-            cols = list(d.keys())
-            vals = [d[c] for c in cols] + [val]
-            conn.execute(
-                f"UPDATE tracks SET {', '.join(f'{c}=?' for c in cols)} WHERE {key}=?",
-                vals,
+        # konflikt, ali ništa se nije promijenilo (WHERE u DO UPDATE)
+        return "unchanged"
+    return "inserted" if row[0] == cur.lastrowid else "updated"
+
+
+# ---------------------------------------------------------------------
+# Batch UPSERT (više final JSON-ova, jedna transakcija)
+# ---------------------------------------------------------------------
+
+# koliko final JSON-ova se paralelno čita/parsira u batch modu
+LOAD_READ_WORKERS = 8
+
+
+def _expand_paths(paths: List[Path]) -> List[Path]:
+    """Direktorij → svi *.final.json ispod njega (rekurzivno, sortirano); ostalo ostaje."""
+    out: List[Path] = []
+    for p in paths:
+        p = Path(p).expanduser()
+        if p.is_dir():
+            found = []
+            for root, _dirs, files in os.walk(p):
+                found.extend(os.path.join(root, f) for f in files if f.endswith(".final.json"))
+            out.extend(Path(f) for f in sorted(found))
+        else:
+            out.append(p)
+    return out
+
+
+def _list_names(directory: Path) -> Set[str]:
+    try:
+        with os.scandir(directory) as it:
+            return {entry.name for entry in it}
+    except OSError:
+        return set()
+
+
+def _read_final(raw_path: Path, keep: frozenset) -> Tuple[Path, Optional[Path], Any]:
+    """Pronađi i učitaj final JSON; greška se vraća umjesto obj-a (za [SKIP])."""
+    cli_path = Path(raw_path).expanduser().resolve()
+    try:
+        final_json_path = _guess_final_json_path(cli_path)
+        return cli_path, final_json_path, _load_final_json(final_json_path, keep)
+    except (SystemExit, OSError) as e:
+        return cli_path, None, e
+
+
+def _iter_final_jsons(
+    paths: List[Path], keep: frozenset, workers: int
+) -> Iterator[Tuple[Path, Optional[Path], Any]]:
+    """Čitanje + parsiranje u thread poolu, rezultati redom kao paths.
+
+    Disk latencija više fajlova se preklapa; u letu je najviše workers*4
+    fajlova da se memorija ne napuni kad je upis sporiji od čitanja.
+    """
+    if workers <= 1 or len(paths) <= 1:
+        for p in paths:
+            yield _read_final(p, keep)
+        return
+
+    window = workers * 4
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Future] = collections.deque()
+        it = iter(paths)
+        for p in it:
+            pending.append(executor.submit(_read_final, p, keep))
+            if len(pending) >= window:
+                break
+        while pending:
+            yield pending.popleft().result()
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append(executor.submit(_read_final, nxt, keep))
+
+
+def main_batch(
+    paths: List[Path],
+    db: Optional[str] = None,
+    dry_run: bool = False,
+    verbose: bool = False,
+    bulk: bool = False,
+    workers: int = LOAD_READ_WORKERS,
+) -> None:
+    """Upiši više final JSON-ova odjednom.
+
+    Konekcija se otvara jednom, svi zapisi idu u jednu transakciju, a
+    zapisi s istim skupom stupaca upisuju se jednim executemany UPSERT-om
+    (bez SELECT-a po redu). Neispravni fajlovi se preskaču uz poruku.
+    bulk=True: ekskluzivni lock na bazu za cijeli upis (vidi _connect).
+    Direktoriji u paths se šire na sve *.final.json ispod njih; fajlovi se
+    čitaju paralelno (workers threadova).
+    """
+    db_path = get_db_path(db)
+    if not db_path.is_file():
+        raise SystemExit(
+            f"[ERROR] Baza ne postoji: {db_path}\n"
+            f"        Kreiraj je prvo pomoću: python -m modules.db_creator create"
+        )
+
+    conn = _connect(db_path, bulk=bulk)
+    try:
+        schema = _get_tracks_schema(conn)
+        # jedan timestamp za cijeli batch (added_at/updated_at)
+        now = _utc_now_str()
+
+        # (ključ, stupci) -> lista redova vrijednosti
+        buckets: Dict[Tuple[str, Tuple[str, ...]], List[Tuple[Any, ...]]] = {}
+        skipped = 0
+        # direktorij -> imena fajlova u njemu (jedan scandir umjesto exists() po tracku)
+        dir_listings: Dict[Path, Set[str]] = {}
+        need_listing = not dry_run and bool(schema.cols & {"audio_path", "meta_s_path"})
+
+        for cli_path, final_json_path, obj in _iter_final_jsons(
+            _expand_paths(paths), schema.keep_paths, workers
+        ):
+            if final_json_path is None:
+                # obj je ovdje greška iz _read_final
+                skipped += 1
+                print(f"[SKIP] {cli_path}: {obj}")
+                continue
+            dir_names = None
+            if need_listing:
+                dir_names = dir_listings.get(final_json_path.parent)
+                if dir_names is None:
+                    dir_names = dir_listings[final_json_path.parent] = _list_names(final_json_path.parent)
+            try:
+                record, key, val = _build_record(
+                    obj, schema, cli_path, final_json_path, dir_names, dry=dry_run
+                )
+            except (SystemExit, OSError) as e:
+                skipped += 1
+                print(f"[SKIP] {cli_path}: {e}")
+                continue
+
+            row_cols, params = _upsert_params(record, now)
+            buckets.setdefault((key, row_cols), []).append(params)
+
+            if verbose:
+                print(f"[INFO] {final_json_path.name}: {key}={val} ({len(record)} polja)")
+
+        total = sum(len(rows) for rows in buckets.values())
+
+        if dry_run:
+            print(f"[OK] dry-run: {total} zapisa spremno za upsert, {skipped} preskočeno.")
+        else:
+            for key in {key for key, _row_cols in buckets}:
+                _ensure_unique_key(conn, key)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # executemany s jednom pripremljenom naredbom po grupi; varijanta
+                # INSERT ... SELECT json_extract(value, '$[i]') FROM json_each(?)
+                # (cijela grupa kao jedan JSON parametar) mjerena je ~2x sporije
+                # jer json_extract ponovno parsira red za svaki stupac
+                for (key, row_cols), rows in buckets.items():
+                    conn.executemany(_make_upsert_sql(row_cols, key), rows)
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            print(
+                f"[OK] upsert {total} zapisa u {len(buckets)} grupa(e) stupaca, "
+                f"{skipped} preskočeno."
             )
-        return "dry-run update" if dry else "updated"
+
+        cur = conn.execute("SELECT COUNT(*) FROM tracks")
+        (count,) = cur.fetchone()
+        print(f"[STATS] Ukupno redova u tablici tracks: {count}")
+
+    finally:
+        conn.close()
 
 
 # ---------------------------------------------------------------------
@@ -363,19 +804,48 @@ def main() -> None:
         prog="load.py",
         description="Upis final JSON-a (.final.json) u tablicu tracks (flatten na sve dostupne stupce).",
     )
-    ap.add_argument("--path", required=True, help="Audio datoteka ili final JSON")
+    ap.add_argument(
+        "--path",
+        required=True,
+        nargs="+",
+        help=(
+            "Audio datoteka, final JSON ili direktorij s *.final.json "
+            "(više putanja ili direktorij = batch upis u jednoj transakciji)"
+        ),
+    )
     ap.add_argument("--db", help="Custom path do SQLite baze (opcionalno)")
     ap.add_argument("--dry-run", action="store_true", help="Ne zapisuj u bazu, samo simuliraj.")
+    ap.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Batch upis uz ekskluzivni lock na bazu (brže; drugi procesi čekaju do kraja).",
+    )
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=LOAD_READ_WORKERS,
+        help=f"Batch: koliko final JSON-ova čitati paralelno (default {LOAD_READ_WORKERS}).",
+    )
     ap.add_argument("--verbose", "-v", action="store_true")
     args = ap.parse_args()
 
-    cli_path = Path(args.path).expanduser().resolve()
+    if len(args.path) > 1 or Path(args.path[0]).expanduser().is_dir():
+        main_batch(
+            [Path(p) for p in args.path],
+            db=args.db,
+            dry_run=args.dry_run,
+            verbose=args.verbose,
+            bulk=args.bulk,
+            workers=args.jobs,
+        )
+        return
+
+    cli_path = Path(args.path[0]).expanduser().resolve()
     final_json_path = _guess_final_json_path(cli_path)
 
     if args.verbose:
         print(f"[INFO] Final JSON: {final_json_path}")
 
-    obj = _load_final_json(final_json_path)
     db_path = get_db_path(args.db)
 
     if not db_path.is_file():
@@ -384,10 +854,13 @@ def main() -> None:
             f"        Kreiraj je prvo pomoću: python -m modules.db_creator create"
         )
 
-    conn = sqlite3.connect(db_path)
+    conn = _connect(db_path)
     try:
-        cols, _key_col = _get_tracks_columns(conn)
-        record, key, val = _build_record(obj, cols, cli_path, final_json_path)
+        schema = _get_tracks_schema(conn)
+        obj = _load_final_json(final_json_path, schema.keep_paths)
+        record, key, val = _build_record(
+            obj, schema, cli_path, final_json_path, dry=args.dry_run
+        )
 
         if args.verbose:
             print(f"[INFO] Upsert ključ: {key}={val}")
@@ -395,6 +868,8 @@ def main() -> None:
             for k in sorted(record.keys()):
                 print(f"  - {k}")
 
+        if not args.dry_run:
+            _ensure_unique_key(conn, key)
         status = _upsert_track(conn, record, key, val, args.dry_run)
 
         if not args.dry_run:
@@ -9,34 +9,50 @@ Zadatak:
 
 Korištenje:
   python -m modules.match --path "/full/path/to/Track.flac"
+  python -m modules.match --path a.flac b.mp3 ... --jobs 8   (batch)
 
 Opcije:
   --dry-run   : ne zapisuje JSON, samo ispisuje rezultat
   --verbose   : detaljniji log (DEBUG)
+  --jobs N    : broj paralelnih matchanja u batch modu (default: 8)
+  --no-hash   : ne računa SHA-256 audio filea; hash se uzima iz cachea ili
+                postojećeg JSON-a, inače je null (merge/load tada ne mogu
+                koristiti pjesmu)
 
 Oslanja se na:
   - config.py (putanje za .hidden/ i logs/)
   - spotify_oauth.py (za inicijalni OAuth i spremanje credova)
   - biblioteku `spotipy` za Spotify Web API
   - biblioteku `mutagen` za čitanje audio tagova
+  - biblioteku `rapidfuzz` za fuzzy usporedbu naslova/artista
 """
 
 import argparse
+import functools
 import json
 import logging
+import os
 import sys
+import threading
 import unicodedata
 import re
+from stat import S_ISREG
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import config
+from modules.apicache import DAY, TTL_DEFAULT, ApiCache, make_key, open_cache
 from utils.file_id import compute_file_hash
+from utils.json_io import read_json, write_json
 
 try:
+    import requests
     import spotipy
+    from requests.adapters import HTTPAdapter
     from spotipy.oauth2 import SpotifyOAuth
+    from urllib3.util.retry import Retry
 except ImportError as e:
     raise SystemExit(
         "ERROR: modul 'spotipy' nije instaliran. Dodaj ga u requirements i instaliraj."
@@ -49,6 +65,13 @@ except ImportError as e:
         "ERROR: modul 'mutagen' nije instaliran. Dodaj ga u requirements i instaliraj."
     ) from e
 
+try:
+    from rapidfuzz import fuzz
+except ImportError as e:
+    raise SystemExit(
+        "ERROR: modul 'rapidfuzz' nije instaliran. Dodaj ga u requirements i instaliraj."
+    ) from e
+
 
 # ---------------------------------------------------------------------------
 # Spotify scope i client helper
@@ -65,9 +88,39 @@ SCOPE = (
 )
 
 
-def build_spotify_client() -> "spotipy.Spotify":
+def _build_http_session(pool_size: int) -> "requests.Session":
+    """HTTP session za Spotipy s poolom za pool_size paralelnih poziva.
+
+    Spotipy-jev default adapter drži najviše 10 konekcija; uz više batch
+    workera višak bi se nakon svakog requesta zatvarao (novi TLS handshake).
+    Retry postavke su iste kao Spotipy-jeve zadane.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        connect=None,
+        read=False,
+        allowed_methods=frozenset({"GET", "POST", "PUT", "DELETE"}),
+        status=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=max(1, pool_size),
+        max_retries=retry,
+        # višak threadova čeka slobodnu konekciju umjesto da otvara nove
+        pool_block=True,
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+def build_spotify_client(pool_size: int = 1) -> "spotipy.Spotify":
     """Stvara Spotipy client koristeći iste credential i token fileove
     koje koristi spotify_oauth modul.
+
+    pool_size: broj threadova koji će paralelno koristiti client (batch).
     """
     cred_path = Path(config.get_spotify_credentials_path())
     token_path = Path(config.get_spotify_token_path())
@@ -100,7 +153,10 @@ def build_spotify_client() -> "spotipy.Spotify":
         open_browser=True,
     )
 
-    sp = spotipy.Spotify(auth_manager=auth_manager)
+    sp = spotipy.Spotify(
+        auth_manager=auth_manager,
+        requests_session=_build_http_session(pool_size),
+    )
     # Lagana provjera da token radi
     me = sp.current_user()
     logging.info(
@@ -146,6 +202,17 @@ class LocalTags:
     year: Optional[int]
     duration_sec: Optional[float]
     track_no: Optional[int]
+    isrc: Optional[str] = None
+
+    # Normalizirani oblici za scoring; računaju se pri prvom pristupu i
+    # pamte na instanci (tagove ne mijenjati nakon što je scoring krenuo).
+    @functools.cached_property
+    def norm_title(self) -> str:
+        return _normalize(self.title or "")
+
+    @functools.cached_property
+    def norm_artist(self) -> str:
+        return _normalize(self.artist or "")
 
 
 @dataclass
@@ -169,19 +236,78 @@ class SpotifyTrackMeta:
     search_query: str
 
 
+class _StripMarksTable(dict):
+    """str.translate tablica koja briše kombinirajuće znakove (kategorija Mn).
+
+    Puni se lijeno: za svaki novi codepoint jednom se pita unicodedata, a
+    rezultat (None = briši, inače isti codepoint) se pamti. Ne-Mn znakove
+    mapiramo na same sebe da translate ne ide kroz KeyError za svaki znak.
+    """
+
+    def __missing__(self, cp: int) -> Optional[int]:
+        v = None if unicodedata.category(chr(cp)) == "Mn" else cp
+        self[cp] = v
+        return v
+
+
+_STRIP_MARKS = _StripMarksTable()
+
+
+@functools.lru_cache(maxsize=4096)
 def _normalize(s: str) -> str:
-    """Lowercase, uklanja naglaske i višestruke razmake (za usporedbu)."""
+    """Lowercase, uklanja naglaske i višestruke razmake (za usporedbu).
+
+    Memoizirano: isti lokalni tagovi i imena artista s rezultata ponavljaju se
+    kroz pretrage. ASCII string nema kombinirajućih znakova pa NFD preskačemo.
+    """
     if not s:
         return ""
     s = s.strip().lower()
+    if s.isascii():
+        return " ".join(s.split())
+    # normalize() već sam radi Quick-Check i vraća isti string ako je već NFD;
+    # dodatni is_normalized() ispred mjereno samo usporava (1.1–1.3x).
     s = unicodedata.normalize("NFD", s)
-    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+    s = s.translate(_STRIP_MARKS)
     s = " ".join(s.split())
     return s
 
 
 MAX_SCORE = 7.0  # teorijski max iz heuristike scoringa
 
+# title/artist: do 3 boda, proporcionalno fuzzy sličnosti (rapidfuzz WRatio:
+# identično = 100, "halo" u "halo (live)" = 90); ispod praga se ne boduje
+TITLE_WEIGHT = 3.0
+ARTIST_WEIGHT = 3.0
+FUZZY_CUTOFF = 75.0
+
+
+def _title_score(norm_title: str, norm_stitle: str) -> float:
+    if not norm_title:
+        return 0.0
+    sim = fuzz.WRatio(norm_title, norm_stitle, score_cutoff=FUZZY_CUTOFF)
+    return TITLE_WEIGHT * sim / 100.0
+
+
+def _artist_score(norm_artist: str, sartists: List[Dict[str, Any]]) -> float:
+    """Najbolja sličnost lokalnog artista s artistima kandidata (Spotify dictovi).
+
+    Imena se normaliziraju usput; cutoff raste s dosad najboljim, a na 100
+    (identično) se staje jer bolje ne može.
+    """
+    if not norm_artist:
+        return 0.0
+    best = 0.0
+    for a in sartists:
+        sim = fuzz.WRatio(
+            norm_artist, _normalize(a.get("name", "")), score_cutoff=max(FUZZY_CUTOFF, best)
+        )
+        if sim > best:
+            best = sim
+            if best >= 100.0:
+                break
+    return ARTIST_WEIGHT * best / 100.0
+
 
 def _score_to_percent(score: float) -> float:
     if score <= 0:
@@ -197,6 +323,17 @@ def _score_to_percent(score: float) -> float:
 # ---------------------------------------------------------------------------
 
 
+# Sva tri oblika imena u jednom prolazu; grane su redom prioriteta:
+#   "NN - Title" | "YYYY - Artist - Title" | "Artist - Title"
+_RE_STEM = re.compile(
+    r"(?P<trk>\d{1,2})\s*-\s*(?P<t1>.+)"
+    r"|(?P<y>\d{4})\s*-\s*(?P<a>.+?)\s*-\s*(?P<t2>.+)"
+    r"|(?P<a3>.+?)\s*-\s*(?P<t3>.+)"
+)
+# samo za rijetki slučaj praznog artist/title dijela u "YYYY - ..." obliku
+_RE_ARTIST_TITLE = re.compile(r"^(.+?)\s*-\s*(.+)$")
+
+
 def _parse_filename_fallback(path: Path) -> LocalTags:
     """Pokušava izvući osnovne tagove iz imena datoteke i foldera.
 
@@ -214,34 +351,36 @@ def _parse_filename_fallback(path: Path) -> LocalTags:
     year: Optional[int] = None
     track_no: Optional[int] = None
 
-    # Pattern 1: "NN - Title"
-    m = re.match(r"^(\d{1,2})\s*-\s*(.+)$", stem)
+    m = _RE_STEM.fullmatch(stem)
     if m:
-        try:
-            track_no = int(m.group(1))
-        except ValueError:
-            track_no = None
-        title = m.group(2).strip()
-
-    # Pattern 2: "YYYY - Artist - Title"
-    if not title:
-        m2 = re.match(r"^(\d{4})\s*-\s*(.+?)\s*-\s*(.+)$", stem)
-        if m2:
+        gd = m.groupdict()
+        if gd["trk"] is not None:
+            # "NN - Title"; "Artist - Title" na istom imenu daje NN kao artista
             try:
-                year = int(m2.group(1))
+                track_no = int(gd["trk"])
+            except ValueError:
+                track_no = None
+            artist = gd["trk"]
+            title = gd["t1"].strip()
+        elif gd["y"] is not None:
+            # "YYYY - Artist - Title"
+            try:
+                year = int(gd["y"])
             except ValueError:
                 year = None
-            artist = m2.group(2).strip()
-            title = m2.group(3).strip()
-
-    # Pattern 3: "Artist - Title"
-    if not title or not artist:
-        m3 = re.match(r"^(.+?)\s*-\s*(.+)$", stem)
-        if m3:
-            if not artist:
-                artist = m3.group(1).strip()
-            if not title:
-                title = m3.group(2).strip()
+            artist = gd["a"].strip()
+            title = gd["t2"].strip()
+            if not title or not artist:
+                m3 = _RE_ARTIST_TITLE.match(stem)
+                if m3:
+                    if not artist:
+                        artist = m3.group(1).strip()
+                    if not title:
+                        title = m3.group(2).strip()
+        else:
+            # "Artist - Title"
+            artist = gd["a3"].strip()
+            title = gd["t3"].strip()
 
     # Fallbackovi
     if not title:
@@ -260,6 +399,83 @@ def _parse_filename_fallback(path: Path) -> LocalTags:
     )
 
 
+# Logičko polje → ključevi tagova po vrsti containera (ime klase mutagen
+# tagova, traži se kroz MRO pa npr. VCFLACDict/OggVCommentDict padaju na
+# VCommentDict, a WAVE/AIFF ID3 na ID3). Vorbis i APE ključevi su
+# neosjetljivi na velika/mala slova pa je dovoljan jedan ključ.
+_TAG_FIELDS = ("artist", "album", "title", "date", "tracknumber", "isrc")
+_TAG_ALIASES: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "ID3": {
+        "artist": ("TPE1",),
+        "album": ("TALB",),
+        "title": ("TIT2",),
+        "date": ("TDRC",),
+        "tracknumber": ("TRCK",),
+        "isrc": ("TSRC",),
+    },
+    "VCommentDict": {
+        "artist": ("artist",),
+        "album": ("album",),
+        "title": ("title",),
+        "date": ("date", "year"),
+        "tracknumber": ("tracknumber",),
+        "isrc": ("isrc",),
+    },
+    "APEv2": {
+        "artist": ("Artist",),
+        "album": ("Album",),
+        "title": ("Title",),
+        "date": ("Year",),
+        "tracknumber": ("Track",),
+        "isrc": ("ISRC",),
+    },
+    "MP4Tags": {
+        "artist": ("©ART",),
+        "album": ("©alb",),
+        "title": ("©nam",),
+        "date": ("©day",),
+        "tracknumber": ("trkn",),
+        "isrc": ("----:com.apple.iTunes:ISRC",),
+    },
+}
+# nepoznat container: probaj sve poznate varijante redom
+_TAG_ALIASES_DEFAULT: Dict[str, Tuple[str, ...]] = {
+    "artist": ("artist", "ARTIST", "TPE1"),
+    "album": ("album", "ALBUM", "TALB"),
+    "title": ("title", "TITLE", "TIT2"),
+    "date": ("date", "YEAR", "TDRC"),
+    "tracknumber": ("tracknumber", "TRCK"),
+    "isrc": ("isrc", "ISRC", "TSRC"),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _tag_aliases_for(tags_type: type) -> Dict[str, Tuple[str, ...]]:
+    for cls in tags_type.__mro__:
+        aliases = _TAG_ALIASES.get(cls.__name__)
+        if aliases is not None:
+            return aliases
+    return _TAG_ALIASES_DEFAULT
+
+
+def _read_tag_fields(tags: Any) -> Dict[str, Optional[str]]:
+    """Prva neprazna vrijednost za svako logičko polje (kao string)."""
+    aliases = _tag_aliases_for(type(tags))
+    out: Dict[str, Optional[str]] = {}
+    for field in _TAG_FIELDS:
+        v = next((tags[k] for k in aliases[field] if k in tags and tags[k]), None)
+        if isinstance(v, list):
+            v = v[0]
+        if isinstance(v, tuple):
+            # MP4 trkn: [(broj, ukupno)]
+            v = v[0]
+        elif isinstance(v, bytes):
+            # MP4 freeform (----:com.apple.iTunes:*) vrijednosti su bytes
+            v = v.decode("utf-8", "replace")
+        out[field] = str(v) if v is not None else None
+    return out
+
+
 def read_local_tags(path: Path) -> LocalTags:
     """Čita osnovne tagove iz audio datoteke koristeći mutagen.
 
@@ -271,24 +487,17 @@ def read_local_tags(path: Path) -> LocalTags:
         logging.warning("Mutagen nije uspio pročitati tagove, koristim filename fallback: %s", path)
         return _parse_filename_fallback(path)
 
-    tags = getattr(audio, "tags", None)
-
-    def _get_first(tag_names: List[str]) -> Optional[str]:
-        if not tags:
-            return None
-        for name in tag_names:
-            if name in tags and tags[name]:
-                v = tags[name]
-                if isinstance(v, list):
-                    return str(v[0])
-                return str(v)
-        return None
+    tags = audio.tags
+    fields = _read_tag_fields(tags) if tags else dict.fromkeys(_TAG_FIELDS)
+    stem = path.stem
 
-    artist = _get_first(["artist", "ARTIST", "TPE1"])
-    album = _get_first(["album", "ALBUM", "TALB"])
-    title = _get_first(["title", "TITLE", "TIT2"]) or path.stem
-    year_str = _get_first(["date", "YEAR", "TDRC"])
-    track_str = _get_first(["tracknumber", "TRCK"])
+    artist = fields["artist"]
+    album = fields["album"]
+    title = fields["title"] or stem
+    year_str = fields["date"]
+    track_str = fields["tracknumber"]
+    # ISRC bez crtica i velikim slovima, kako ga vraća Spotify
+    isrc = (fields["isrc"] or "").replace("-", "").strip().upper() or None
 
     year: Optional[int] = None
     if year_str:
@@ -317,6 +526,7 @@ def read_local_tags(path: Path) -> LocalTags:
         year=year,
         duration_sec=duration_sec,
         track_no=track_no,
+        isrc=isrc,
     )
 
     # Ako nešto bitno nedostaje, pokušaj dopuniti iz filename-a
@@ -326,7 +536,7 @@ def read_local_tags(path: Path) -> LocalTags:
         tags_obj.artist = fb.artist
     if not tags_obj.album and fb.album:
         tags_obj.album = fb.album
-    if (not tags_obj.title or tags_obj.title == path.stem) and fb.title:
+    if (not tags_obj.title or tags_obj.title == stem) and fb.title:
         tags_obj.title = fb.title
     if not tags_obj.year and fb.year:
         tags_obj.year = fb.year
@@ -351,9 +561,110 @@ def read_local_tags(path: Path) -> LocalTags:
 # Spotify search & scoring (per track)
 # ---------------------------------------------------------------------------
 
+# Rezultati pretrage se čuvaju u zajedničkom API cacheu (modules.apicache);
+# ponovljeni match istog filea ne ide na Spotify. Prazni rezultati kraće,
+# da se nova izdanja pojave.
+SEARCH_CACHE_TTL = 30 * DAY
+SEARCH_CACHE_TTL_EMPTY = TTL_DEFAULT
+SEARCH_LIMIT = 5
+
+# Hash audio filea (SHA-256 cijelog filea) čuvamo po (path, mtime_ns, size):
+# promjena sadržaja mijenja mtime/size pa stari zapis jednostavno ne pogodi.
+FILE_HASH_CACHE_TTL = 90 * DAY
+
+_MATCH_CACHE: Optional[ApiCache] = None
+_MATCH_CACHE_ENABLED = True
+_MATCH_CACHE_LOCK = threading.Lock()
+
+
+def _get_match_cache() -> Optional[ApiCache]:
+    global _MATCH_CACHE, _MATCH_CACHE_ENABLED
+    if not _MATCH_CACHE_ENABLED:
+        return None
+    with _MATCH_CACHE_LOCK:
+        if _MATCH_CACHE is None:
+            _MATCH_CACHE = open_cache()
+            if _MATCH_CACHE is None:
+                _MATCH_CACHE_ENABLED = False
+        return _MATCH_CACHE
+
+
+def _file_hash_key(path: Path, st: os.stat_result) -> str:
+    return make_key("file-hash", {"path": str(path), "mtime_ns": st.st_mtime_ns, "size": st.st_size})
+
+
+def _cached_file_hash(path: Path, st: os.stat_result) -> str:
+    """compute_file_hash s cacheom po (path, mtime_ns, size)."""
+    cache = _get_match_cache()
+    key = _file_hash_key(path, st)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    file_hash = compute_file_hash(path)
+    if cache is not None:
+        cache.put(key, file_hash, FILE_HASH_CACHE_TTL)
+    return file_hash
+
+
+def _known_file_hash(path: Path, st: os.stat_result) -> Optional[str]:
+    """Hash bez čitanja audio filea (za --no-hash): iz cachea ili iz postojećeg
+    .spotify.json-a ako mu size/mtime odgovaraju trenutnom fileu; inače None."""
+    cache = _get_match_cache()
+    if cache is not None:
+        cached = cache.get(_file_hash_key(path, st))
+        if cached is not None:
+            return cached
+
+    try:
+        file_info = read_json(get_spotify_json_path(path)).get("file") or {}
+    except (OSError, ValueError, AttributeError):
+        return None
+    file_hash = file_info.get("hash_sha256")
+    if (
+        isinstance(file_hash, str)
+        and file_info.get("size_bytes") == st.st_size
+        and file_info.get("mtime") == int(st.st_mtime)
+    ):
+        return file_hash
+    return None
+
+
+def _cached_search(sp: "spotipy.Spotify", q: str, limit: int = SEARCH_LIMIT) -> List[Dict[str, Any]]:
+    """sp.search(type=track) s cacheom; vraća listu track itema."""
+    cache = _get_match_cache()
+    key = make_key("match-search", {"q": q, "limit": limit})
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            logging.debug("Spotify search (cache): %s", q)
+            return cached
+
+    result = sp.search(q=q, type="track", limit=limit)
+    items = result.get("tracks", {}).get("items", [])
+    if cache is not None:
+        cache.put(key, items, SEARCH_CACHE_TTL if items else SEARCH_CACHE_TTL_EMPTY)
+    return items
+
+
 
 def search_best_match(sp: "spotipy.Spotify", tags: LocalTags) -> Optional[SpotifyTrackMeta]:
-    """Pokušava pronaći najbolji Spotify track za zadane lokalne tagove."""
+    """Pokušava pronaći najbolji Spotify track za zadane lokalne tagove.
+
+    Napomena o brzini: cijelo bodovanje (5 kandidata, bez mreže) mjereno je
+    ~40 µs po tracku, prema ~250 ms za Spotify poziv i SHA-256 filea; AOT
+    kompilacija (mypyc/Cython) ovog modula zato ne bi donijela ništa mjerljivo.
+    """
+    if tags.isrc:
+        # ISRC je jednoznačan: pogodak s istim ISRC-om je match bez bodovanja
+        query_isrc = f"isrc:{tags.isrc}"
+        logging.debug("Spotify search (ISRC): %s", query_isrc)
+        for item in _cached_search(sp, query_isrc, limit=1):
+            if (item.get("external_ids") or {}).get("isrc", "").upper() == tags.isrc:
+                return _track_meta(tags, item, MAX_SCORE, query_isrc)
+        logging.debug("Nema Spotify tracka za ISRC %s, nastavljam s pretragom.", tags.isrc)
+
     if not tags.title:
         logging.error("Nema title taga, ne mogu raditi Spotify search.")
         return None
@@ -366,49 +677,43 @@ def search_best_match(sp: "spotipy.Spotify", tags: LocalTags) -> Optional[Spotif
     query1 = " ".join(query1_parts) if query1_parts else tags.title
 
     logging.debug("Spotify search 1: %s", query1)
-    result = sp.search(q=query1, type="track", limit=5)
-    items = result.get("tracks", {}).get("items", [])
+    items = _cached_search(sp, query1)
 
     if not items and tags.artist:
         # fallback: "artist title"
         query2 = f"{tags.artist} {tags.title}"
         logging.debug("Spotify search 2 (fallback): %s", query2)
-        result = sp.search(q=query2, type="track", limit=5)
-        items = result.get("tracks", {}).get("items", [])
+        items = _cached_search(sp, query2)
         query1 = query2  # zapamti realno korišteni query
 
     if not items:
         logging.warning("Nema Spotify rezultata za: %s — %s", tags.artist, tags.title)
         return None
 
-    norm_artist = _normalize(tags.artist or "")
-    norm_title = _normalize(tags.title or "")
+    norm_artist = tags.norm_artist
+    norm_title = tags.norm_title
 
     best_item = None
     best_score = -1.0
+    # Najveći score koji je za ove tagove uopće dostižan; kandidat koji ga
+    # postigne ne može biti nadmašen (izjednačenje zadržava prvog), pa ostale
+    # ne treba bodovati. (MAX_SCORE je samo skala za postotak.)
+    score_ceiling = TITLE_WEIGHT + ARTIST_WEIGHT
+    if tags.year:
+        score_ceiling += 1.0
+    if tags.duration_sec:
+        score_ceiling += 1.0
+
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
 
     for item in items:
         stitle = item.get("name", "")
-        sartists = [a.get("name", "") for a in item.get("artists", [])]
+        sartists = item.get("artists", [])
         album = item.get("album", {}) or {}
         release = album.get("release_date") or ""
 
-        norm_stitle = _normalize(stitle)
-        norm_sartists = [_normalize(a) for a in sartists]
-
-        score = 0.0
-
-        # Title match
-        if norm_title and norm_title == norm_stitle:
-            score += 3.0
-        elif norm_title and (norm_title in norm_stitle or norm_stitle in norm_title):
-            score += 2.0
-
-        # Artist match
-        if norm_artist and any(norm_artist == na for na in norm_sartists):
-            score += 3.0
-        elif norm_artist and any(norm_artist in na or na in norm_artist for na in norm_sartists):
-            score += 2.0
+        # Title + artist match (fuzzy: "Beyonce" ~ "Beyoncé feat. Jay-Z")
+        score = _title_score(norm_title, _normalize(stitle)) + _artist_score(norm_artist, sartists)
 
         # Godina
         if tags.year and release:
@@ -432,22 +737,32 @@ def search_best_match(sp: "spotipy.Spotify", tags: LocalTags) -> Optional[Spotif
             except Exception:
                 pass
 
-        logging.debug(
-            "Candidate: %s — %s [%s] score=%.1f",
-            ", ".join(sartists),
-            stitle,
-            release,
-            score,
-        )
+        if debug:
+            logging.debug(
+                "Candidate: %s — %s [%s] score=%.1f",
+                ", ".join(a.get("name", "") for a in sartists),
+                stitle,
+                release,
+                score,
+            )
 
         if score > best_score:
             best_score = score
             best_item = item
+            if best_score >= score_ceiling:
+                break
 
     if not best_item:
         logging.warning("Nije pronađen adekvatan kandidat za: %s — %s", tags.artist, tags.title)
         return None
 
+    return _track_meta(tags, best_item, best_score, query1)
+
+
+def _track_meta(
+    tags: LocalTags, best_item: Dict[str, Any], best_score: float, query: str
+) -> SpotifyTrackMeta:
+    """SpotifyTrackMeta iz odabranog Spotify track itema (+ log matcha)."""
     track_id = best_item["id"]
     track_url = best_item["external_urls"]["spotify"]
     album = best_item.get("album", {}) or {}
@@ -480,7 +795,7 @@ def search_best_match(sp: "spotipy.Spotify", tags: LocalTags) -> Optional[Spotif
         isrc=isrc,
         match_score_raw=round(best_score, 2),
         match_score_percent=score_percent,
-        search_query=query1,
+        search_query=query,
     )
 
     logging.info(
@@ -502,16 +817,24 @@ def search_best_match(sp: "spotipy.Spotify", tags: LocalTags) -> Optional[Spotif
 
 def build_spotify_json(
     audio_path: Path,
+    stat: os.stat_result,
     tags: LocalTags,
     meta: Optional[SpotifyTrackMeta],
     unmatched_reason: Optional[str] = None,
     search_query: Optional[str] = None,
+    include_hash: bool = True,
 ) -> Dict[str, Any]:
-    """Gradi strukturu JSON-a koja će se zapisati u .stem.spotify.json."""
-    audio_path = audio_path.resolve()
-    stat = audio_path.stat()
+    """Gradi strukturu JSON-a koja će se zapisati u .stem.spotify.json.
 
-    file_hash = compute_file_hash(audio_path)
+    audio_path mora biti već resolve()-an, a stat njegov stat_result
+    (pozivatelj ih ionako ima, v. _resolve_audio_path).
+    include_hash=False preskače čitanje cijelog filea: hash se uzima iz cachea
+    ili postojećeg .spotify.json-a (ako je file nepromijenjen), inače je null.
+    """
+    if include_hash:
+        file_hash = _cached_file_hash(audio_path, stat)
+    else:
+        file_hash = _known_file_hash(audio_path, stat)
 
     data: Dict[str, Any] = {
         "schema": {
@@ -572,25 +895,40 @@ def build_spotify_json(
 
 
 def get_spotify_json_path(audio_path: Path) -> Path:
-    """Vraća putanju do skrivenog .stem.spotify.json file-a uz audio."""
-    audio_path = audio_path.resolve()
-    stem = audio_path.stem
-    json_name = f".{stem}.spotify.json"
-    return audio_path.with_name(json_name)
+    """Vraća putanju do skrivenog .stem.spotify.json file-a uz (resolve()-ani) audio."""
+    return audio_path.with_name(f".{audio_path.stem}.spotify.json")
 
 
 # ---------------------------------------------------------------------------
 # CLI komanda
 # ---------------------------------------------------------------------------
 
+# Batch: pretrage su čisti mrežni I/O (~250 ms RTT), pa ih preklapamo u
+# thread poolu nad jednim Spotify clientom (jedan OAuth token).
+MATCH_WORKERS = 8
+
+
+def _resolve_audio_path(raw: str) -> Tuple[Path, Optional[os.stat_result]]:
+    """Jedan resolve() i jedan stat() po fileu; stat je None ako file ne postoji."""
+    audio_path = Path(raw).expanduser().resolve()
+    try:
+        return audio_path, audio_path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        return audio_path, None
+
 
 def cmd_match(args: argparse.Namespace) -> None:
-    audio_path = Path(args.path).expanduser()
+    if len(args.path) > 1:
+        cmd_match_batch(args)
+        return
 
-    if not audio_path.exists():
+    audio_path, st = _resolve_audio_path(args.path[0])
+
+    if st is None:
         raise SystemExit(f"ERROR: audio datoteka ne postoji: {audio_path}")
-    if not audio_path.is_file():
+    if not S_ISREG(st.st_mode):
         raise SystemExit(f"ERROR: zadani --path nije file: {audio_path}")
+    include_hash = not args.no_hash
 
     logging.info("Pokrećem match za: %s", audio_path)
 
@@ -608,14 +946,15 @@ def cmd_match(args: argparse.Namespace) -> None:
             return
         data = build_spotify_json(
             audio_path,
+            st,
             tags,
             meta=None,
             unmatched_reason="no_spotify_results_or_low_score",
             search_query=None,
+            include_hash=include_hash,
         )
         out_path = get_spotify_json_path(audio_path)
-        with out_path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        write_json(out_path, data, pretty=True)
         logging.info("Zapisao Spotify JSON (unmatched): %s", out_path)
         print(f"[OK] Zapisano unmatched u: {out_path}")
         return
@@ -643,15 +982,77 @@ def cmd_match(args: argparse.Namespace) -> None:
         logging.info("Dry-run uključen, NE zapisujem .spotify.json.")
         return
 
-    data = build_spotify_json(audio_path, tags, meta)
+    data = build_spotify_json(audio_path, st, tags, meta, include_hash=include_hash)
     out_path = get_spotify_json_path(audio_path)
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_json(out_path, data, pretty=True)
 
     logging.info("Zapisao Spotify JSON: %s", out_path)
     print(f"\n[OK] Zapisano u: {out_path}")
 
 
+def _match_one(sp: "spotipy.Spotify", raw_path: str, dry_run: bool, include_hash: bool = True) -> str:
+    """Match jedne datoteke u batch modu; vraća status (matched/unmatched/...)."""
+    audio_path, st = _resolve_audio_path(raw_path)
+    if st is None or not S_ISREG(st.st_mode):
+        logging.error("Audio datoteka ne postoji ili nije file: %s", audio_path)
+        return "error"
+
+    tags = read_local_tags(audio_path)
+    if not tags.title:
+        logging.error("Nije moguće odrediti title: %s", audio_path)
+        return "error"
+
+    meta = search_best_match(sp, tags)
+    status = "matched" if meta is not None else "unmatched"
+    if dry_run:
+        return status
+
+    if meta is None:
+        data = build_spotify_json(
+            audio_path,
+            st,
+            tags,
+            meta=None,
+            unmatched_reason="no_spotify_results_or_low_score",
+            search_query=None,
+            include_hash=include_hash,
+        )
+    else:
+        data = build_spotify_json(audio_path, st, tags, meta, include_hash=include_hash)
+    out_path = get_spotify_json_path(audio_path)
+    write_json(out_path, data, pretty=True)
+    logging.debug("Zapisao Spotify JSON (%s): %s", status, out_path)
+    return status
+
+
+def cmd_match_batch(args: argparse.Namespace) -> None:
+    """Match više datoteka s jednim Spotify clientom i paralelnim pretragama."""
+    paths = args.path
+    jobs = max(1, min(args.jobs, len(paths)))
+    logging.info("Batch match: %d datoteka, paralelnih poslova (--jobs): %d", len(paths), jobs)
+
+    sp = build_spotify_client(pool_size=jobs)
+    counts: Dict[str, int] = {"matched": 0, "unmatched": 0, "error": 0}
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(_match_one, sp, p, args.dry_run, not args.no_hash): p for p in paths}
+        for future in as_completed(futures):
+            audio_path = futures[future]
+            try:
+                status = future.result()
+            except Exception as exc:  # noqa: BLE001
+                logging.exception("Greška pri matchu %s: %s", audio_path, exc)
+                status = "error"
+            counts[status] += 1
+            print(f"[{status.upper()}] {audio_path}")
+
+    print(
+        f"\n[OK] Batch gotov: matched={counts['matched']} "
+        f"unmatched={counts['unmatched']} error={counts['error']}"
+        + (" (dry-run, ništa nije zapisano)" if args.dry_run else "")
+    )
+
+
 # ---------------------------------------------------------------------------
 # Argparse / main
 # ---------------------------------------------------------------------------
@@ -669,7 +1070,8 @@ def build_arg_parser() -> argparse.ArgumentParser:
     p.add_argument(
         "--path",
         required=True,
-        help="Puni path do audio datoteke za match.",
+        nargs="+",
+        help="Puni path do audio datoteke za match (više pathova = batch mod).",
     )
     p.add_argument(
         "--dry-run",
@@ -681,6 +1083,26 @@ def build_arg_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Detaljni log (DEBUG).",
     )
+    p.add_argument(
+        "--no-hash",
+        action="store_true",
+        help=(
+            "Ne računa SHA-256 audio filea (brži re-scan). Hash se uzima iz cachea "
+            "ili postojećeg .spotify.json-a ako je file nepromijenjen, inače je "
+            "hash_sha256 null — merge/load trebaju hash, pa takve pjesme load preskače."
+        ),
+    )
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=MATCH_WORKERS,
+        help=f"Broj paralelnih matchanja u batch modu (default: {MATCH_WORKERS}).",
+    )
+    p.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ne koristi lokalni cache (Spotify pretrage, hashevi fileova).",
+    )
     p.set_defaults(func=cmd_match)
     return p
 
@@ -689,6 +1111,9 @@ def main(argv: Optional[List[str]] = None) -> None:
     parser = build_arg_parser()
     args = parser.parse_args(argv)
     setup_logging(verbose=getattr(args, "verbose", False))
+    global _MATCH_CACHE_ENABLED
+    if args.no_cache:
+        _MATCH_CACHE_ENABLED = False
     if not hasattr(args, "func"):
         parser.print_help()
         return
@@ -1,24 +1,47 @@
 from __future__ import annotations
 
-import argparse
-import json
+import os
+import re
+import sys
 import time
-from datetime import datetime
+from functools import cache, partial
 from pathlib import Path
+from typing import Callable
+
+from utils.json_io import loads, read_json, sync_all, write_json
 
-# Pokušaj uvesti config, ali nemoj srušiti skriptu ako ne postoji
 try:
-    import config  # type: ignore
-except Exception:
-    config = None  # type: ignore
+    import ijson  # opcionalno: streaming parse velikih analysis/spotify JSON-ova
+except ImportError:
+    ijson = None
+
+# argparse, datetime, concurrent.futures i config uvoze se tek u funkcijama
+# koje ih trebaju — import ovog modula iz većeg CLI-ja ostaje jeftin.
+
+AUDIO_EXTS = frozenset({".mp3", ".flac", ".wav", ".m4a", ".ogg", ".wave"})
 
+# Pjesme su međusobno neovisne (čitanje + parse JSON-ova + zapis), a parse je
+# CPU posao pod GIL-om, pa paralelno radimo u procesima. map() čuva redoslijed
+# ispisa; chunksize smanjuje IPC po pjesmi.
+MERGE_CHUNKSIZE = 8
 
-AUDIO_EXTS = {".mp3", ".flac", ".wav", ".m4a", ".ogg", ".wave"}
+# JSON veći od ovoga čita se streamom (ijson) i materijaliziraju se samo
+# top-level ključevi koje build_final_json koristi; manje fajlove orjson
+# dekodira cijele brže nego što ih ijson prođe.
+STREAM_MIN_BYTES = 8 * 1024 * 1024
+SPOTIFY_KEYS = frozenset({"schema", "file", "local_tags", "spotify", "match"})
+AUDIO_KEYS = frozenset(
+    {"schema", "file", "local_tags", "audio", "features", "genre", "mood", "instruments"}
+)
 
 
+@cache
 def get_music_root() -> str | None:
-    """Vrati root iz configa, ako postoji."""
-    if config is None:
+    """Vrati root iz configa, ako postoji (računa se jednom po procesu)."""
+    # Pokušaj uvesti config, ali nemoj srušiti skriptu ako ne postoji
+    try:
+        import config  # type: ignore
+    except Exception:
         return None
     # preferiraj get_music_root() ako postoji
     if hasattr(config, "get_music_root"):
@@ -35,40 +58,97 @@ def get_music_root() -> str | None:
     return None
 
 
-def iter_audio_files(path: Path) -> list[Path]:
-    """Vrati listu audio datoteka za obradu (file ili rekurzivni folder)."""
+def scan_audio_files(path: Path) -> tuple[list[Path], dict[Path, frozenset[str]]]:
+    """Audio datoteke za obradu (file ili rekurzivni folder) + imena u svakom folderu.
+
+    Imena služe process_tracku da provjeri postojanje JSON-ova bez stat()-a.
+    """
     if path.is_file():
         if path.suffix.lower() in AUDIO_EXTS:
-            return [path]
+            return [path], {}
         else:
             print(f"[UPOZORENJE] Nije audio datoteka, preskačem: {path}")
-            return []
+            return [], {}
     if path.is_dir():
+        # os.walk (scandir ispod): kao rglob ne ulazi u symlinkane foldere i
+        # preskače nečitljive; tip unosa zna iz readdir-a pa nema stat() po
+        # fileu. Path se gradi samo za audio fileove.
         files: list[Path] = []
-        for p in path.rglob("*"):
-            if p.is_file() and p.suffix.lower() in AUDIO_EXTS:
-                files.append(p)
-        return sorted(files)
+        listings: dict[Path, frozenset[str]] = {}
+        for dirpath, dirnames, filenames in os.walk(path):
+            listings[Path(dirpath)] = frozenset(dirnames + filenames)
+            for name in filenames:
+                # ekstenzija iz imena bez splitext/PurePath; i > 0 kao
+                # Path.suffix (".mp3" je skriveni file bez ekstenzije)
+                i = name.rfind(".")
+                if i > 0 and name[i:].lower() in AUDIO_EXTS:
+                    files.append(Path(dirpath, name))
+        files.sort()
+        return files, listings
     print(f"[GREŠKA] Putanja ne postoji: {path}")
-    return []
+    return [], {}
+
+
+def iter_audio_files(path: Path) -> list[Path]:
+    """Vrati listu audio datoteka za obradu (file ili rekurzivni folder)."""
+    return scan_audio_files(path)[0]
+
+
+def sidecar_names(audio_path: Path) -> tuple[str, str, str, str]:
+    """Imena JSON-ova uz audio: novi i stari .analysis.json, .spotify.json, .final.json."""
+    stem = audio_path.stem
+    return (
+        f".{stem}.analysis.json",
+        f"{audio_path.name}.analysis.json",
+        f".{stem}.spotify.json",
+        f".{stem}.final.json",
+    )
+
+
+def _load_partial(path: Path, keys: frozenset) -> dict | None:
+    """Stream parse top-level objekta, samo ključevi iz keys; None ako dokument nije objekt."""
+    with path.open("rb") as f:
+        if not f.read(64).lstrip().startswith(b"{"):
+            return None
+        f.seek(0)
+        try:
+            return {k: v for k, v in ijson.kvitems(f, "", use_float=True) if k in keys}
+        except ijson.JSONError as e:
+            # yajl poruka ima više redaka (s "strelicom"); za log je dosta prvi
+            raise ValueError(str(e).splitlines()[0]) from e
+
 
+def load_json(
+    path: Path, label: str, out: Callable[[str], None] = print, keys: frozenset | None = None
+) -> object | None:
+    """Učitaj JSON. Vraća Python objekt (dict/list/str...). Ne ruši skriptu.
 
-def load_json(path: Path, label: str) -> object | None:
-    """Učitaj JSON. Vraća Python objekt (dict/list/str...). Ne ruši skriptu."""
+    Uz keys (i ijson) veliki fajlovi se čitaju streamom i vraćaju se samo ti
+    top-level ključevi.
+    """
     try:
-        with path.open("r", encoding="utf-8") as f:
-            obj = json.load(f)
+        obj = None
+        if keys is not None and ijson is not None and path.stat().st_size >= STREAM_MIN_BYTES:
+            try:
+                obj = _load_partial(path, keys)
+            except ValueError:
+                # yajl ne prima NaN/Infinity (stdlib json ih piše) — puni
+                # parse ispod ih prihvaća, a za stvarno neispravan JSON
+                # javlja grešku
+                obj = None
+        if obj is None:
+            obj = read_json(path)
     except FileNotFoundError:
-        print(f"  [GREŠKA] {label}: datoteka ne postoji: {path}")
+        out(f"  [GREŠKA] {label}: datoteka ne postoji: {path}")
         return None
     except Exception as e:
-        print(f"  [GREŠKA] {label}: ne mogu pročitati JSON {path}: {e}")
+        out(f"  [GREŠKA] {label}: ne mogu pročitati JSON {path}: {e}")
         return None
 
     # Ako je string koji možda sadrži JSON, pokušaj još jednom
     if isinstance(obj, str):
         try:
-            inner = json.loads(obj)
+            inner = loads(obj)
             obj = inner
         except Exception:
             # ako ne uspije, ostavi string kakav jest
@@ -77,11 +157,11 @@ def load_json(path: Path, label: str) -> object | None:
     return obj
 
 
-def safe_get_dict(obj: object, label: str) -> dict | None:
+def safe_get_dict(obj: object, label: str, out: Callable[[str], None] = print) -> dict | None:
     """Vrati obj ako je dict, inače ispiši grešku i vrati None."""
     if isinstance(obj, dict):
         return obj
-    print(f"  [GREŠKA] {label} JSON nije dict nego {type(obj).__name__}; preskačem ovu pjesmu.")
+    out(f"  [GREŠKA] {label} JSON nije dict nego {type(obj).__name__}; preskačem ovu pjesmu.")
     return None
 
 
@@ -96,10 +176,56 @@ def safe_get_file_hash(obj: object) -> str | None:
     return val if isinstance(val, str) else None
 
 
-def build_final_json(spotify: dict, audio: dict, audio_json_path: Path, spotify_json_path: Path) -> dict:
+# "file": {... "hash_sha256": "<hex>"} na početku fajla; [^{}] osigurava da je
+# hash izravno u tom objektu (ne u nekom ugniježđenom)
+_RE_FILE_HASH = re.compile(rb'"file"\s*:\s*\{[^{}]*?"hash_sha256"\s*:\s*"([0-9a-f]{64})"')
+PEEK_BYTES = 16 * 1024
+
+
+def peek_file_hash(path: Path) -> str | None:
+    """Brzo pročitaj file.hash_sha256 iz početka JSON-a bez punog parsiranja.
+
+    None ako ga nema u prvih PEEK_BYTES (ili fajl nije čitljiv) — tada
+    odlučuje puna provjera nakon load_json.
+    """
+    try:
+        with path.open("rb") as f:
+            head = f.read(PEEK_BYTES)
+    except OSError:
+        return None
+    m = _RE_FILE_HASH.search(head)
+    return m.group(1).decode("ascii") if m else None
+
+
+def report_hash_mismatch(
+    audio_path: Path, hash_spot: str, hash_audio: str, out: Callable[[str], None] = print
+) -> None:
+    out(f"[UPOZORENJE] Hash mismatch između Spotify i audio JSON-a za: {audio_path}")
+    out(f"            spotify: {hash_spot}")
+    out(f"            audio  : {hash_audio}")
+    out("            → preporuka: ponovo pokrenuti match.py i/ili audio_analyze.py.")
+
+
+def utc_timestamp() -> str:
+    """Trenutno UTC vrijeme kao "YYYY-MM-DDTHH:MM:SSZ"."""
+    from datetime import datetime
+
+    return datetime.utcnow().isoformat(timespec="seconds") + "Z"
+
+
+def build_final_json(
+    spotify: dict,
+    audio: dict,
+    audio_json_path: Path,
+    spotify_json_path: Path,
+    created_at: str | None = None,
+) -> dict:
     """
     Konstruira finalni JSON objekt iz spotify + audio analiza JSON-ova.
 
+    created_at: vrijeme merge-a; main ga računa jednom po pokretanju pa sve
+    pjesme iz istog runa imaju isti timestamp (None = sada).
+
     Pravila za "file" blok:
     - Osnovni izvor je spotify["file"] (match modul) jer tamo imamo hash_sha256, path, size, mtime...
     - Zatim dodajemo sva polja iz audio["file"] koja još ne postoje u tom dictu.
@@ -107,14 +233,13 @@ def build_final_json(spotify: dict, audio: dict, audio_json_path: Path, spotify_
     file_info_spot = spotify.get("file")
     if not isinstance(file_info_spot, dict):
         file_info_spot = {}
-
-    file_info = dict(file_info_spot)  # kopija
-
     file_info_audio = audio.get("file")
-    if isinstance(file_info_audio, dict):
-        for k, v in file_info_audio.items():
-            if k not in file_info:
-                file_info[k] = v
+    if not isinstance(file_info_audio, dict):
+        file_info_audio = {}
+
+    # jedan dict u C-u: redoslijed ključeva je spotify pa novi iz audija,
+    # a vrijednosti spotify imaju prednost (zadnji unpack pobjeđuje)
+    file_info = {**file_info_spot, **file_info_audio, **file_info_spot}
 
     final_obj: dict = {
         "schema": {
@@ -135,7 +260,7 @@ def build_final_json(spotify: dict, audio: dict, audio_json_path: Path, spotify_
         "mood": audio.get("mood") or {},
         "instruments": audio.get("instruments") or {},
         "merge": {
-            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "created_at": created_at or utc_timestamp(),
             "audio_json": str(audio_json_path),
             "spotify_json": str(spotify_json_path),
         },
@@ -143,27 +268,22 @@ def build_final_json(spotify: dict, audio: dict, audio_json_path: Path, spotify_
     return final_obj
 
 
-def print_track_summary(final_obj: dict, final_path: Path, elapsed: float) -> None:
+def _dict_field(obj: dict, key: str) -> dict:
+    """obj[key] ako je dict, inače prazan dict (bez upozorenja, za ispis)."""
+    val = obj.get(key)
+    return val if isinstance(val, dict) else {}
+
+
+def print_track_summary(
+    final_obj: dict, final_path: Path, elapsed: float, out: Callable[[str], None] = print
+) -> None:
     """Ispis sažetka za jednu pjesmu – hash, Spotify, žanr, mood, instrumenti."""
-    file_info = final_obj.get("file") or {}
-    if not isinstance(file_info, dict):
-        file_info = {}
-    features = final_obj.get("features") or {}
-    genre = final_obj.get("genre") or {}
-    mood = final_obj.get("mood") or {}
-    instruments = final_obj.get("instruments") or {}
-    spotify = final_obj.get("spotify") or {}
-
-    if not isinstance(features, dict):
-        features = {}
-    if not isinstance(genre, dict):
-        genre = {}
-    if not isinstance(mood, dict):
-        mood = {}
-    if not isinstance(instruments, dict):
-        instruments = {}
-    if not isinstance(spotify, dict):
-        spotify = {}
+    file_info = _dict_field(final_obj, "file")
+    features = _dict_field(final_obj, "features")
+    genre = _dict_field(final_obj, "genre")
+    mood = _dict_field(final_obj, "mood")
+    instruments = _dict_field(final_obj, "instruments")
+    spotify = _dict_field(final_obj, "spotify")
 
     duration = features.get("duration")
     sr = features.get("sample_rate")
@@ -191,34 +311,49 @@ def print_track_summary(final_obj: dict, final_path: Path, elapsed: float) -> No
     spot_id = spotify.get("id")
     spot_url = spotify.get("url")
 
-    print(f"  → zapisano: {final_path}")
-    print(f"  Sažetak finalnog zapisa:")
-    print(f"    Vrijeme merge-a : {elapsed:.2f} s")
+    out(f"  → zapisano: {final_path}")
+    out(f"  Sažetak finalnog zapisa:")
+    out(f"    Vrijeme merge-a : {elapsed:.2f} s")
     if file_path:
-        print(f"    Datoteka        : {file_path}")
+        out(f"    Datoteka        : {file_path}")
     if stem:
-        print(f"    Naslov          : {stem}")
+        out(f"    Naslov          : {stem}")
     if hash_sha256:
-        print(f"    Hash (sha256)   : {hash_sha256}")
+        out(f"    Hash (sha256)   : {hash_sha256}")
     if spot_id or spot_url:
-        print(f"    Spotify ID / URL: {spot_id}  |  {spot_url}")
+        out(f"    Spotify ID / URL: {spot_id}  |  {spot_url}")
     if duration is not None and sr is not None:
-        print(f"    Trajanje        : {duration:.1f} s @ {sr} Hz")
+        out(f"    Trajanje        : {duration:.1f} s @ {sr} Hz")
     if tempo is not None or key is not None:
-        print(f"    Tempo / Key     : {tempo:.1f} BPM, {key}")
+        out(f"    Tempo / Key     : {tempo:.1f} BPM, {key}")
     if energy is not None or beat_density is not None:
-        print(f"    Energy / Beat   : {energy:.2f}  |  beat_density={beat_density:.3f}")
+        out(f"    Energy / Beat   : {energy:.2f}  |  beat_density={beat_density:.3f}")
     if primary or alt_1 or conf is not None:
-        print(f"    Žanr            : {primary} (alt: {alt_1}, conf={conf:.2f})")
+        out(f"    Žanr            : {primary} (alt: {alt_1}, conf={conf:.2f})")
     if mood_tag or (valence is not None) or (arousal is not None):
-        print(f"    Mood            : {mood_tag} (val={valence:.2f}, aro={arousal:.2f})")
+        out(f"    Mood            : {mood_tag} (val={valence:.2f}, aro={arousal:.2f})")
     if lead or bass or drums:
-        print(f"    Instrumenti     : lead={lead}, bass={bass}, drums={drums}")
-
-
-def process_track(audio_path: Path, force: bool, dry_run: bool):
+        out(f"    Instrumenti     : lead={lead}, bass={bass}, drums={drums}")
+
+
+def process_track(
+    audio_path: Path,
+    force: bool,
+    dry_run: bool,
+    out: Callable[[str], None] = print,
+    sidecars: frozenset[str] | None = None,
+    created_at: str | None = None,
+    quiet: bool = False,
+    fsync: bool = True,
+    pretty: bool = False,
+):
     """
-    Obradi jednu audio datoteku.
+    Obradi jednu audio datoteku. Poruke idu kroz out() (default print;
+    paralelni worker ih skuplja u listu pa ih main ispisuje redom).
+    sidecars: postojeći JSON-ovi uz audio (iz scan_audio_files); None = exists().
+    quiet: bez sažetka za uspješno spojene pjesme (upozorenja se i dalje ispisuju).
+    fsync: False = bez fsync po fajlu; pozivatelj tada sam radi sync_all().
+    pretty: final JSON s uvlakama (default kompaktan — ~2× manji, brži zapis).
     status ∈ {
       'merged', 'skipped_final_exists',
       'missing_audio_json', 'missing_spotify_json',
@@ -226,25 +361,27 @@ def process_track(audio_path: Path, force: bool, dry_run: bool):
     }
     """
     parent = audio_path.parent
-    stem = audio_path.stem
 
     # Podrška za dva formata imena audio JSON-a:
     #  1) NOVI:  .<stem>.analysis.json
     #  2) STARI: <filename>.mp3.analysis.json
-    new_audio_json = parent / f".{stem}.analysis.json"
-    old_audio_json = Path(str(audio_path) + ".analysis.json")
+    new_name, old_name, spotify_name, final_name = sidecar_names(audio_path)
+    new_audio_json = parent / new_name
+    old_audio_json = parent / old_name
+    spotify_json_path = parent / spotify_name
+    final_json_path = parent / final_name
+
+    def exists(p: Path) -> bool:
+        return p.name in sidecars if sidecars is not None else p.exists()
 
-    if new_audio_json.exists():
+    if exists(new_audio_json):
         audio_json_path = new_audio_json
-    elif old_audio_json.exists():
+    elif exists(old_audio_json):
         audio_json_path = old_audio_json
     else:
         # preferiramo novi naziv u porukama / budućim generacijama
         audio_json_path = new_audio_json
 
-    spotify_json_path = parent / f".{stem}.spotify.json"
-    final_json_path = parent / f".{stem}.final.json"
-
     info = {
         "audio": str(audio_path),
         "audio_json": str(audio_json_path),
@@ -252,26 +389,34 @@ def process_track(audio_path: Path, force: bool, dry_run: bool):
         "final_json": str(final_json_path),
     }
 
-    if final_json_path.exists() and not force:
-        print(f"[SKIP] Već postoji final JSON, preskačem: {audio_path}")
+    if exists(final_json_path) and not force:
+        out(f"[SKIP] Već postoji final JSON, preskačem: {audio_path}")
         return "skipped_final_exists", info
 
     # Provjera postojanja JSON-ova
-    if not audio_json_path.exists():
-        print(f"[DORADA] Nedostaje audio analiza (.analysis.json): {audio_json_path}")
-        print("         → pokreni audio_analyze.py za ovu pjesmu.")
+    if not exists(audio_json_path):
+        out(f"[DORADA] Nedostaje audio analiza (.analysis.json): {audio_json_path}")
+        out("         → pokreni audio_analyze.py za ovu pjesmu.")
         return "missing_audio_json", info
 
-    if not spotify_json_path.exists():
-        print(f"[DORADA] Nedostaje Spotify JSON (.stem.spotify.json): {spotify_json_path}")
-        print("         → pokreni match.py za ovu pjesmu.")
+    if not exists(spotify_json_path):
+        out(f"[DORADA] Nedostaje Spotify JSON (.stem.spotify.json): {spotify_json_path}")
+        out("         → pokreni match.py za ovu pjesmu.")
         return "missing_spotify_json", info
 
-    spotify_raw = load_json(spotify_json_path, "Spotify")
-    audio_raw = load_json(audio_json_path, "Audio")
+    # Hash mismatch se vidi već iz "file" bloka na početku oba JSON-a; tada
+    # ne parsiramo cijelu (često veliku) audio analizu uzalud.
+    hash_spot = peek_file_hash(spotify_json_path)
+    hash_audio = peek_file_hash(audio_json_path) if hash_spot else None
+    if hash_spot and hash_audio and hash_spot != hash_audio:
+        report_hash_mismatch(audio_path, hash_spot, hash_audio, out)
+        return "hash_mismatch", info
 
-    spotify_obj = safe_get_dict(spotify_raw, "Spotify")
-    audio_obj = safe_get_dict(audio_raw, "Audio")
+    spotify_raw = load_json(spotify_json_path, "Spotify", out, SPOTIFY_KEYS)
+    audio_raw = load_json(audio_json_path, "Audio", out, AUDIO_KEYS)
+
+    spotify_obj = safe_get_dict(spotify_raw, "Spotify", out)
+    audio_obj = safe_get_dict(audio_raw, "Audio", out)
 
     if spotify_obj is None or audio_obj is None:
         # već je ispisana greška u safe_get_dict
@@ -281,29 +426,55 @@ def process_track(audio_path: Path, force: bool, dry_run: bool):
     hash_spot = safe_get_file_hash(spotify_obj)
     hash_audio = safe_get_file_hash(audio_obj)
     if hash_spot and hash_audio and hash_spot != hash_audio:
-        print(f"[UPOZORENJE] Hash mismatch između Spotify i audio JSON-a za: {audio_path}")
-        print(f"            spotify: {hash_spot}")
-        print(f"            audio  : {hash_audio}")
-        print("            → preporuka: ponovo pokrenuti match.py i/ili audio_analyze.py.")
+        report_hash_mismatch(audio_path, hash_spot, hash_audio, out)
         return "hash_mismatch", info
 
     t0 = time.time()
-    final_obj = build_final_json(spotify_obj, audio_obj, audio_json_path, spotify_json_path)
+    final_obj = build_final_json(
+        spotify_obj, audio_obj, audio_json_path, spotify_json_path, created_at=created_at
+    )
     elapsed = time.time() - t0
 
     if not dry_run:
         try:
-            with final_json_path.open("w", encoding="utf-8") as f:
-                json.dump(final_obj, f, ensure_ascii=False, indent=2)
+            write_json(final_json_path, final_obj, pretty=pretty, fsync=fsync)
         except Exception as e:
-            print(f"[GREŠKA] Ne mogu zapisati final JSON {final_json_path}: {e}")
+            out(f"[GREŠKA] Ne mogu zapisati final JSON {final_json_path}: {e}")
             return "error", info
 
-    print_track_summary(final_obj, final_json_path, elapsed)
+    if not quiet:
+        print_track_summary(final_obj, final_json_path, elapsed, out)
     return "merged", info
 
 
+def _process_track_buffered(
+    item: tuple[Path, frozenset[str] | None],
+    force: bool,
+    dry_run: bool,
+    created_at: str,
+    quiet: bool = False,
+    pretty: bool = False,
+):
+    """process_track za pool workere: uz status vraća i poruke kao listu."""
+    audio_path, sidecars = item
+    lines: list[str] = []
+    status, info = process_track(
+        audio_path,
+        force=force,
+        dry_run=dry_run,
+        out=lines.append,
+        sidecars=sidecars,
+        created_at=created_at,
+        quiet=quiet,
+        fsync=False,
+        pretty=pretty,
+    )
+    return status, info, lines
+
+
 def main(argv: list[str] | None = None) -> int:
+    import argparse
+
     parser = argparse.ArgumentParser(
         prog="modules.merge",
         description="Merge modul — spajanje .spotify.json i .analysis.json u .final.json",
@@ -323,6 +494,34 @@ def main(argv: list[str] | None = None) -> int:
         action="store_true",
         help="Ne zapisuj final JSON, samo pokaži što bi se napravilo.",
     )
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Zapiši final JSON s uvlakama (default: kompaktan).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Broj paralelnih procesa (default: broj CPU jezgri; 1 = bez poola).",
+    )
+    parser.add_argument(
+        "--threads",
+        action="store_true",
+        help=(
+            "Workeri su threadovi umjesto procesa (--jobs ih određuje). Za "
+            "mrežni/spori disk gdje čekanje na I/O dominira nad parseom."
+        ),
+    )
+    parser.add_argument(
+        "--quiet",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=(
+            "Jedna linija po pjesmi, bez sažetka finalnog zapisa "
+            "(default: uključeno kad izlaz nije terminal, npr. preusmjeren u log)."
+        ),
+    )
 
     args = parser.parse_args(argv)
 
@@ -334,11 +533,18 @@ def main(argv: list[str] | None = None) -> int:
 
     base_path = Path(args.path)
 
-    audio_files = iter_audio_files(base_path)
+    audio_files, listings = scan_audio_files(base_path)
     if not audio_files:
         print("Nema audio datoteka za obradu.")
         return 1
 
+    def sidecars_of(audio_path: Path) -> frozenset[str] | None:
+        # samo relevantna imena (ne cijeli folder) — šalju se workerima
+        names = listings.get(audio_path.parent)
+        if names is None:
+            return None
+        return frozenset(n for n in sidecar_names(audio_path) if n in names)
+
     total = len(audio_files)
     print(f"Pronađeno audio datoteka: {total}")
 
@@ -351,15 +557,64 @@ def main(argv: list[str] | None = None) -> int:
         "error": 0,
     }
 
-    t_start = time.time()
-    for idx, audio_path in enumerate(audio_files, start=1):
-        print(f"[{idx}/{total}] Spajam: {audio_path}")
-        status, _info = process_track(audio_path, force=args.force, dry_run=args.dry_run)
+    def count(status: str) -> None:
         if status in stats:
             stats[status] += 1
         else:
             stats["error"] += 1
 
+    # sažetak (~15 linija po pjesmi) ima smisla samo na terminalu; kad
+    # stdout nije TTY, Python ga ionako blok-bufferira pa nije potrebno
+    # ništa dodatno podešavati
+    quiet = args.quiet if args.quiet is not None else not sys.stdout.isatty()
+
+    t_start = time.time()
+    created_at = utc_timestamp()
+    jobs = max(1, min(args.jobs, total))
+    if jobs == 1:
+        for idx, audio_path in enumerate(audio_files, start=1):
+            print(f"[{idx}/{total}] Spajam: {audio_path}")
+            status, _info = process_track(
+                audio_path,
+                force=args.force,
+                dry_run=args.dry_run,
+                sidecars=sidecars_of(audio_path),
+                created_at=created_at,
+                quiet=quiet,
+                fsync=False,
+                pretty=args.pretty,
+            )
+            count(status)
+    else:
+        # čitanje/pisanje fileova otpušta GIL pa se s --threads I/O jedne
+        # pjesme preklapa s parseom druge i na jednoj jezgri
+        if args.threads:
+            from concurrent.futures import ThreadPoolExecutor as Executor
+        else:
+            from concurrent.futures import ProcessPoolExecutor as Executor
+
+        worker = partial(
+            _process_track_buffered,
+            force=args.force,
+            dry_run=args.dry_run,
+            created_at=created_at,
+            quiet=quiet,
+            pretty=args.pretty,
+        )
+        with Executor(max_workers=jobs) as executor:
+            items = ((p, sidecars_of(p)) for p in audio_files)
+            results = executor.map(worker, items, chunksize=MERGE_CHUNKSIZE)
+            for idx, (audio_path, (status, _info, lines)) in enumerate(zip(audio_files, results), start=1):
+                print(f"[{idx}/{total}] Spajam: {audio_path}")
+                for line in lines:
+                    print(line)
+                count(status)
+
+    # finalni JSON-ovi se pišu bez fsync po fajlu; jedan sync na kraju
+    # umjesto flusha diska za svaku pjesmu
+    if stats["merged"] and not args.dry_run:
+        sync_all()
+
     t_total = time.time() - t_start
     print("\n=== Statistika merge modula ===")
     print(f"  Ukupno pjesama        : {total}")
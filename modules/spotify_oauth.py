@@ -36,17 +36,21 @@ from __future__ import annotations
 import os
 import sys
 import json
-import argparse
-from datetime import datetime
+import functools
 from pathlib import Path
-from typing import Optional, Dict, Any
-
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-from spotipy.cache_handler import CacheFileHandler
+from typing import TYPE_CHECKING, Optional, Dict, Any
 
 from config import get_hidden_json_path
 
+# spotipy (requests, urllib3, ...) se uvozi tek u funkcijama koje ga trebaju,
+# tako da import ovog modula ne plaća taj trošak (~250 ms na hladnom startu).
+# Isto vrijedi za argparse i datetime (samo CLI / ispis tokena).
+if TYPE_CHECKING:
+    import argparse
+
+    import spotipy
+    from spotipy.oauth2 import SpotifyOAuth
+
 
 # ---------------------------------------------------------------------------
 # Postavke & fajlovi
@@ -70,12 +74,15 @@ SPOTIFY_SCOPES = [
 DEFAULT_REDIRECT_URI = "http://127.0.0.1:9090/callback"
 
 
+# putanje se ne mijenjaju tijekom runa — mkdir samo pri prvom pozivu
+@functools.lru_cache(maxsize=None)
 def _get_cred_path() -> str:
     path = get_hidden_json_path(CRED_FILENAME)
     Path(path).parent.mkdir(parents=True, exist_ok=True)
     return path
 
 
+@functools.lru_cache(maxsize=None)
 def _get_token_cache_path() -> str:
     path = get_hidden_json_path(TOKEN_CACHE_FILENAME)
     Path(path).parent.mkdir(parents=True, exist_ok=True)
@@ -196,6 +203,9 @@ def get_auth_manager(scope: Optional[str] = None, interactive: bool = False) ->
         Ako je True, može pokrenuti wizard za credove.
         Inače očekuje da su credovi već postavljeni.
     """
+    from spotipy.oauth2 import SpotifyOAuth
+    from spotipy.cache_handler import CacheFileHandler
+
     _ensure_credentials(interactive=interactive)
 
     if scope is None:
@@ -221,6 +231,8 @@ def get_spotify_client(scope: Optional[str] = None) -> spotipy.Spotify:
         sp = get_spotify_client()
     (ovdje ne ide interactive wizard; pretpostavlja se da je oauth već napravljen)
     """
+    import spotipy
+
     auth_manager = get_auth_manager(scope=scope, interactive=False)
     sp = spotipy.Spotify(auth_manager=auth_manager)
     return sp
@@ -242,6 +254,8 @@ def _load_cached_token(auth_manager: SpotifyOAuth) -> Optional[Dict[str, Any]]:
 def _format_remaining(expires_at_ts: Optional[int]) -> str:
     if expires_at_ts is None:
         return "nepoznato"
+    from datetime import datetime
+
     now_ts = int(datetime.now().timestamp())
     delta = expires_at_ts - now_ts
     if delta <= 0:
@@ -270,6 +284,9 @@ def cmd_auto() -> None:
     - Ako ima token -> Spotipy ga po potrebi osvježi.
     - Uvijek na kraju provjerava current_user().
     """
+    import spotipy
+    from datetime import datetime
+
     print("=== Spotify OAuth (auto) ===")
     creds = _ensure_credentials(interactive=True)
     print(f"[INFO] Korišteni Spotify Client ID: {creds['client_id'][:8]}...")
@@ -320,6 +337,9 @@ def cmd_info() -> None:
     - expires_at u human readable formatu
     - current_user()
     """
+    import spotipy
+    from datetime import datetime
+
     # ovdje ne želimo da usput otvaramo browser, pa interactive=False
     auth_manager = get_auth_manager(interactive=False)
     token_info = _load_cached_token(auth_manager)
@@ -375,6 +395,8 @@ def cmd_info() -> None:
 # ---------------------------------------------------------------------------
 
 def _build_arg_parser() -> argparse.ArgumentParser:
+    import argparse
+
     parser = argparse.ArgumentParser(
         prog="python -m modules.spotify_oauth",
         description="Spotify OAuth helper modul (auto / info).",
@@ -389,6 +411,13 @@ def _build_arg_parser() -> argparse.ArgumentParser:
 
 
 def main(argv: Optional[list[str]] = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    # najčešći slučaj (bez argumenata) ne treba argparse
+    if not argv:
+        cmd_auto()
+        return
+
     parser = _build_arg_parser()
     args = parser.parse_args(argv)
 
@@ -1,18 +1,67 @@
 #!/usr/bin/env python3
 """Utility for computing stable file hashes used as track IDs."""
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, Iterable, Optional
 import hashlib
+import mmap
+import os
+
+try:
+    import blake3  # optional: only used when algo="blake3" is requested
+except ImportError:
+    blake3 = None
+
+# chunk size for the streaming fallback (empty / unmappable files)
+CHUNK_SIZE = 4 * 1024 * 1024
 
 
 def compute_file_hash(path: Path, algo: str = "sha256") -> str:
-    """Compute a hash of a file in streaming mode (1 MB chunks).
+    """Compute a hash of a file.
 
     This is used as a stable identifier for a given audio file across all
-    pipeline segments (match / analyse / merge / load).
+    pipeline segments (match / analyse / merge / load), stored as
+    file.hash_sha256 — so the default must stay sha256.
+
+    The file is mmapped and hashed in a single update() call (hashlib
+    releases the GIL and skips the per-chunk Python loop); files that
+    can't be mapped (e.g. empty) are read in CHUNK_SIZE chunks.
+    algo="blake3" uses the optional blake3 package's own mmap reader and
+    tree-hashes a single large file across all cores.
     """
+    if algo == "blake3":
+        if blake3 is None:
+            raise ValueError("algo='blake3' requires the blake3 package")
+        h = blake3.blake3(max_threads=blake3.blake3.AUTO)
+        h.update_mmap(str(path))
+        return h.hexdigest()
+
     h = hashlib.new(algo)
     with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+            return h.hexdigest()
+        except (ValueError, OSError):
+            pass
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
             h.update(chunk)
     return h.hexdigest()
+
+
+def hash_files(
+    paths: Iterable[Path], algo: str = "sha256", max_workers: Optional[int] = None
+) -> Dict[Path, str]:
+    """Hash many files in parallel; returns {path: hexdigest}.
+
+    Threads are enough here: hashlib (and blake3) release the GIL while
+    hashing, so files are processed truly in parallel.
+    """
+    paths = list(paths)
+    if not paths:
+        return {}
+    workers = max_workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+        digests = executor.map(lambda p: compute_file_hash(p, algo), paths)
+        return dict(zip(paths, digests))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Fast JSON encode/decode helpers (orjson when available, stdlib json otherwise)."""
+
+import json
+import math
+import mmap
+import os
+from pathlib import Path
+from typing import Any
+
+# temp files are created with mode 0666 so the kernel applies the process
+# umask, giving the same permissions as a plain open(path, "w") would
+# (mkstemp would create them 0600)
+_TMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
+# tokens stdlib json accepts but orjson rejects
+_NONFINITE_MARKS = (b"NaN", b"Infinity")
+_NONFINITE_MARKS_STR = ("NaN", "Infinity")
+
+# files at least this large are mapped instead of read into a bytes copy
+MMAP_MIN_BYTES = 256 * 1024
+
+try:
+    import orjson  # optional: C encoder/decoder, several times faster than stdlib
+except ImportError:
+    orjson = None
+
+
+def _has_nonfinite(obj: Any) -> bool:
+    """True if obj contains a NaN/Infinity float anywhere.
+
+    orjson writes those as null; stdlib json (and files written by
+    audio_analyze) keep them as NaN/Infinity. Float lists are checked with
+    a C-level sum(), which propagates NaN/inf; only if the sum is not finite
+    (possibly overflow of finite values) are the items checked one by one.
+    """
+    t = type(obj)
+    if t is float:
+        return not math.isfinite(obj)
+    if t is dict:
+        items = obj.values()
+    elif t is list or t is tuple:
+        try:
+            total = sum(obj, 0.0)
+        except (TypeError, OverflowError):
+            items = obj
+        else:
+            return not math.isfinite(total) and not all(map(math.isfinite, obj))
+    else:
+        return False
+    return any(map(_has_nonfinite, items))
+
+
+def dumps_bytes(obj: Any, pretty: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes.
+
+    Compact by default; pretty=True gives 2-space indentation. Non-ASCII
+    characters are written as-is (same as ensure_ascii=False). Objects
+    holding NaN/Infinity go through stdlib json so the values are kept
+    instead of becoming null.
+    """
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+        # orjson writes NaN/Infinity as null: only output that contains a
+        # null can have lost a value, so only then walk the object
+        if b"null" not in data or not _has_nonfinite(obj):
+            return data
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    """Parse JSON from bytes or str.
+
+    orjson rejects NaN/Infinity, which stdlib json writes by default; such
+    input is retried with stdlib json so the result does not depend on
+    whether orjson is installed.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            raw = bytes(data) if isinstance(data, memoryview) else data
+            marks = _NONFINITE_MARKS if isinstance(raw, bytes) else _NONFINITE_MARKS_STR
+            if not any(m in raw for m in marks):
+                raise
+            return json.loads(raw)
+    return json.loads(data)
+
+
+def read_json(path: Path) -> Any:
+    """Read and parse a JSON file.
+
+    With orjson, large files are decoded straight from an mmap of the file,
+    skipping the intermediate bytes buffer; otherwise the bytes are read
+    and passed to loads().
+    """
+    if orjson is not None:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size >= MMAP_MIN_BYTES:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        return loads(view)
+            return loads(f.read())
+    return loads(Path(path).read_bytes())
+
+
+def _create_temp(path: Path) -> tuple[int, str]:
+    """Create a new temp file next to path; returns (fd, name)."""
+    for _ in range(100):
+        name = os.path.join(path.parent, f".{path.name}.{os.urandom(4).hex()}.tmp")
+        try:
+            return os.open(name, _TMP_FLAGS, 0o666), name
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"no free temporary name for {path}")
+
+
+def write_json(path: Path, obj: Any, pretty: bool = False, fsync: bool = True) -> None:
+    """Write obj as JSON to path atomically.
+
+    Data goes to a temporary file in the same directory which then replaces
+    path via os.replace, so readers (e.g. a parallel queue worker) never see
+    a half-written file, even if the writer crashes.
+
+    fsync=False skips the per-file fsync; batch writers then call sync_all()
+    once at the end instead of paying a disk flush for every file.
+    """
+    data = dumps_bytes(obj, pretty=pretty)
+    fd, tmp_name = _create_temp(path)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def sync_all() -> None:
+    """Flush all pending writes to disk (one os.sync() for a batch of
+    write_json(..., fsync=False) calls). No-op where os.sync is missing."""
+    if hasattr(os, "sync"):
+        os.sync()